@@ -1,15 +1,50 @@
 from flask import Flask
 from flask_login import LoginManager
 from flask_migrate import Migrate
-from flask_sqlalchemy import SQLAlchemy
 
+from app.cache import LRUCache, ResponseCache
 from app.config import Config
+from app.database import RoutingSQLAlchemy, log_pool_status, route_reads
 
-application = app = Flask(__name__)
-app.config.from_object(Config)
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
-login = LoginManager(app)
-login.login_view = "login"
+db = RoutingSQLAlchemy()
+migrate = Migrate()
+login = LoginManager()
+login.login_view = "main.login"
+chart_cache = LRUCache(Config.CHART_CACHE_BYTES)
+response_cache = ResponseCache()
 
-from app import models, routes
+
+def create_app(config=None):
+    """Build an application from Config, with ``config`` overriding any of
+    its settings.
+
+    Creating the app opens no database connections, so it is safe to call
+    in a gunicorn master that preloads the app before forking workers.
+    """
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.from_mapping(config or {})
+
+    db.init_app(app)
+    migrate.init_app(app, db)
+    login.init_app(app)
+    chart_cache.max_bytes = app.config["CHART_CACHE_BYTES"]
+    response_cache.init_app(app)
+
+    from app import api, cli, metrics, routes
+
+    metrics.init_app(app)
+
+    app.register_blueprint(routes.bp)
+    app.register_blueprint(api.bp)
+    app.register_blueprint(cli.bp)
+    app.register_blueprint(metrics.bp)
+
+    app.before_request(route_reads)
+
+    @app.after_request
+    def _log_pool_status(response):
+        log_pool_status(db)
+        return response
+
+    return app
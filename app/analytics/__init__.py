@@ -0,0 +1,98 @@
+"""Vectorised aggregates over every session, computed with pandas.
+
+Each table is fetched once as columns with ``pd.read_sql`` and every
+aggregate is a group-by over those frames, instead of walking ORM objects
+row by row.
+"""
+import json
+
+import pandas as pd
+
+from app import db
+from app.models import Project, Session, Skill, bridge_session_skill
+
+PERIODS = {"day": "D", "week": "W", "month": "M"}
+
+
+def load_frames(connection=None):
+    """Fetch the session, session/skill bridge, skill and project columns."""
+    connection = connection or db.session.connection()
+    sessions = pd.read_sql(
+        db.select(
+            [
+                Session.id,
+                Session.duration,
+                Session.level,
+                Session.created,
+                Session.user_id,
+                Session.project_id,
+            ]
+        ),
+        connection,
+        parse_dates=["created"],
+    )
+    bridge = pd.read_sql(
+        db.select(
+            [
+                bridge_session_skill.c.session_id,
+                bridge_session_skill.c.skill_id,
+            ]
+        ),
+        connection,
+    )
+    skills = pd.read_sql(db.select([Skill.id, Skill.name]), connection)
+    projects = pd.read_sql(db.select([Project.id, Project.name]), connection)
+    return sessions, bridge, skills, projects
+
+
+def _totals(frame, by):
+    return (
+        frame.groupby(by, sort=True)["duration"]
+        .agg(minutes="sum", sessions="count")
+        .reset_index()
+    )
+
+
+def skill_totals(sessions, bridge, skills):
+    joined = bridge.merge(
+        sessions[["id", "duration"]], left_on="session_id", right_on="id"
+    )
+    totals = _totals(joined, "skill_id")
+    return totals.merge(
+        skills.rename(columns={"id": "skill_id"}), on="skill_id"
+    )[["skill_id", "name", "minutes", "sessions"]]
+
+
+def project_totals(sessions, projects):
+    totals = _totals(sessions, "project_id")
+    return totals.merge(
+        projects.rename(columns={"id": "project_id"}), on="project_id"
+    )[["project_id", "name", "minutes", "sessions"]]
+
+
+def level_totals(sessions):
+    return _totals(sessions, "level")
+
+
+def period_totals(sessions, period="week"):
+    starts = sessions["created"].dt.to_period(PERIODS[period]).dt.start_time
+    totals = _totals(sessions.assign(period=starts.dt.date), "period")
+    totals["period"] = totals["period"].astype(str)
+    return totals
+
+
+def _records(frame):
+    return json.loads(frame.to_json(orient="records"))
+
+
+def summary(period="week", connection=None):
+    """Return every aggregate as JSON-ready lists of records."""
+    sessions, bridge, skills, projects = load_frames(connection)
+    return {
+        "sessions": int(len(sessions)),
+        "minutes": int(sessions["duration"].sum()),
+        "skills": _records(skill_totals(sessions, bridge, skills)),
+        "projects": _records(project_totals(sessions, projects)),
+        "levels": _records(level_totals(sessions)),
+        "periods": _records(period_totals(sessions, period)),
+    }
@@ -0,0 +1,76 @@
+"""Compare the vectorised skill totals with a per-row Python loop.
+
+Run with ``python -m app.analytics.benchmark 1000 10000 100000 1000000``.
+Data is synthetic and kept in memory, so only aggregation cost is measured.
+"""
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from app.analytics import skill_totals
+
+SKILLS = 50
+SKILLS_PER_SESSION = 3
+
+
+def synthetic_frames(n, seed=0):
+    rng = np.random.default_rng(seed)
+    sessions = pd.DataFrame(
+        {
+            "id": np.arange(1, n + 1),
+            "duration": rng.integers(5, 240, n),
+        }
+    )
+    bridge = pd.DataFrame(
+        {
+            "session_id": np.repeat(sessions["id"], SKILLS_PER_SESSION),
+            "skill_id": rng.integers(1, SKILLS + 1, n * SKILLS_PER_SESSION),
+        }
+    ).drop_duplicates()
+    skills = pd.DataFrame(
+        {
+            "id": np.arange(1, SKILLS + 1),
+            "name": ["skill {}".format(i) for i in range(1, SKILLS + 1)],
+        }
+    )
+    return sessions, bridge, skills
+
+
+def loop_skill_totals(sessions, bridge, skills):
+    """The row-at-a-time aggregation the analytics module replaces."""
+    durations = dict(zip(sessions["id"].tolist(), sessions["duration"]))
+    names = dict(zip(skills["id"].tolist(), skills["name"]))
+    minutes = defaultdict(int)
+    counts = defaultdict(int)
+    for session_id, skill_id in bridge.itertuples(index=False):
+        minutes[names[skill_id]] += durations[session_id]
+        counts[names[skill_id]] += 1
+    return minutes, counts
+
+
+def _time(func, *args):
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+
+def main(sizes):
+    print(
+        "{:>10} {:>12} {:>12} {:>8}".format("sessions", "loop", "pandas", "x")
+    )
+    for n in sizes:
+        frames = synthetic_frames(n)
+        loop = _time(loop_skill_totals, *frames)
+        vectorised = _time(skill_totals, *frames)
+        print(
+            "{:>10} {:>11.4f}s {:>11.4f}s {:>7.1f}x".format(
+                n, loop, vectorised, loop / vectorised
+            )
+        )
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1000, 10000, 100000, 1000000])
@@ -0,0 +1,122 @@
+"""Read-only JSON API under ``/api/v1``.
+
+Every response carries an ETag and Last-Modified computed from the newest
+``edited`` stamp of the session, skill and project tables and their row
+counts, so any write to a serialized table changes them. A request whose
+validators still match is answered with 304 before the listing query runs,
+so unchanged pollers cost one small aggregate query.
+"""
+import hashlib
+from functools import wraps
+
+from flask import Blueprint, abort, jsonify, request
+
+from app import db, response_cache
+from app.models import Project, Session, Skill
+from app.listings import filter_sessions, keyset_page, with_session_relations
+
+bp = Blueprint("api", __name__, url_prefix="/api/v1")
+
+
+def _data_version():
+    return db.session.query(
+        *[
+            db.session.query(aggregate).scalar_subquery()
+            for model in (Session, Skill, Project)
+            for aggregate in (
+                db.func.max(model.edited),
+                db.func.count(model.id),
+            )
+        ]
+    ).one()
+
+
+def conditional(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = _data_version()
+        etag = hashlib.sha1(
+            repr((request.full_path, tuple(version))).encode()
+        ).hexdigest()
+
+        response = jsonify()
+        response.set_etag(etag)
+        stamps = [stamp for stamp in version[::2] if stamp is not None]
+        response.last_modified = max(stamps) if stamps else None
+        response.cache_control.no_cache = True
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+
+        response.set_data(jsonify(view(*args, **kwargs)).get_data())
+        return response
+
+    return wrapper
+
+
+def _listing(page, key):
+    return {
+        key: [item.to_dict() for item in page.items],
+        "older": page.older_url,
+        "newer": page.newer_url,
+    }
+
+
+@bp.route("/sessions")
+@conditional
+def sessions():
+    query = filter_sessions(with_session_relations(Session.query))
+    return _listing(keyset_page(query, Session), "sessions")
+
+
+@bp.route("/sessions/<int:id>")
+@conditional
+def session_one(id):
+    return with_session_relations(Session.query).get_or_404(id).to_dict()
+
+
+@bp.route("/projects")
+@conditional
+def projects():
+    return _listing(keyset_page(Project.query, Project), "projects")
+
+
+@bp.route("/projects/<int:id>")
+@conditional
+def project_one(id):
+    project = Project.query.get_or_404(id)
+    data = project.to_dict()
+    data["skills"] = [
+        {"name": name, "minutes": int(minutes)}
+        for name, minutes in project.get_skill_minutes()
+    ]
+    return data
+
+
+@bp.route("/skills")
+@conditional
+def skills():
+    query = Skill.query.options(db.joinedload(Skill.stats))
+    return _listing(keyset_page(query, Skill), "skills")
+
+
+@bp.route("/skills/<int:id>")
+@conditional
+def skill_one(id):
+    return (
+        Skill.query.options(db.joinedload(Skill.stats))
+        .get_or_404(id)
+        .to_dict()
+    )
+
+
+@bp.route("/aggregates")
+@response_cache.cached(query_args=("period",))
+@conditional
+def aggregates():
+    from app import analytics
+
+    period = request.args.get("period", "week")
+    if period not in analytics.PERIODS:
+        abort(404)
+    return analytics.summary(period)
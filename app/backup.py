@@ -0,0 +1,331 @@
+import csv
+import io
+import time
+from datetime import datetime
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from flask import current_app
+
+from app import db
+from app.models import (
+    Project,
+    Session,
+    Skill,
+    User,
+    bridge_session_skill,
+    find_skills,
+    parse_skill_names,
+    skill_name_key,
+)
+from app.rollups import rebuild_rollups
+from app.search import rebuild_search_index
+
+USER_HEADER = ["username", "email", "password_hash", "admin"]
+SKILL_HEADER = ["name", "explanation"]
+PROJECT_HEADER = ["name"]
+SESSION_HEADER = [
+    "name",
+    "duration",
+    "level",
+    "explanation",
+    "created",
+    "edited",
+    "starttime",
+    "endtime",
+    "private",
+    "user_id",
+    "project_id",
+    "skills,",
+]
+
+
+class _ChunkSink(object):
+    """Write-only file object that buffers what ZipFile writes into it.
+
+    It has no ``seek``/``tell``, so ZipFile falls back to data descriptors
+    and never needs to rewind, which lets the archive be sent as it is built.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _user_rows(yield_per):
+    for u in User.query.order_by(User.id).yield_per(yield_per):
+        yield [u.username, u.email, u.password_hash, u.admin]
+
+
+def _skill_rows(yield_per):
+    for s in Skill.query.order_by(Skill.id).yield_per(yield_per):
+        yield [s.name, s.explanation]
+
+
+def _project_rows(yield_per):
+    for p in Project.query.order_by(Project.id).yield_per(yield_per):
+        yield [p.name]
+
+
+def _session_rows(yield_per):
+    query = (
+        Session.query.options(db.selectinload(Session.skills))
+        .order_by(Session.id)
+        .yield_per(yield_per)
+    )
+    for s in query:
+        yield [
+            s.name,
+            s.duration,
+            s.level,
+            s.explanation,
+            s.created,
+            s.edited,
+            s.starttime,
+            s.endtime,
+            s.private,
+            s.user_id,
+            s.project_id,
+            s.get_skill_list_string().replace(",", "|"),
+        ]
+
+
+BACKUP_MEMBERS = [
+    ("user.csv", USER_HEADER, _user_rows),
+    ("skill.csv", SKILL_HEADER, _skill_rows),
+    ("project.csv", PROJECT_HEADER, _project_rows),
+    ("session.csv", SESSION_HEADER, _session_rows),
+]
+
+
+def iter_backup_zip(yield_per=1000, progress=None):
+    """Yield a zip archive of every table as CSV, chunk by chunk.
+
+    Rows are read ``yield_per`` at a time through a streaming cursor and
+    written straight into the archive, so memory stays bounded by one batch
+    regardless of table size. ``progress`` is called with the running row
+    count after every batch.
+    """
+    sink = _ChunkSink()
+    rows = 0
+
+    with ZipFile(sink, "w", compression=ZIP_DEFLATED) as archive:
+        for arcname, header, member_rows in BACKUP_MEMBERS:
+            with archive.open(arcname, "w", force_zip64=True) as member:
+                text = io.TextIOWrapper(member, encoding="utf-8", newline="")
+                writer = csv.writer(text)
+                writer.writerow(header)
+                for row in member_rows(yield_per):
+                    writer.writerow(row)
+                    rows += 1
+                    if rows % yield_per == 0:
+                        text.flush()
+                        if progress is not None:
+                            progress(rows)
+                        yield sink.drain()
+                text.flush()
+                text.detach()
+            yield sink.drain()
+
+    if progress is not None:
+        progress(rows)
+
+    yield sink.drain()
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _read_member(archive, name):
+    with archive.open(name) as member:
+        reader = csv.reader(
+            io.TextIOWrapper(member, encoding="utf-8", newline="")
+        )
+        next(reader, None)
+        for row in reader:
+            if row:
+                yield row
+
+
+def _parse_datetime(value):
+    return datetime.strptime(value.split(".")[0], "%Y-%m-%d %H:%M:%S")
+
+
+def _skill_ids():
+    return {
+        skill_name_key(name): skill_id
+        for name, skill_id in db.session.query(Skill.name, Skill.id)
+    }
+
+
+def _insert_missing_skills(names, skill_ids):
+    missing = {}
+    for name in sorted(names):
+        if skill_name_key(name) not in skill_ids:
+            missing.setdefault(skill_name_key(name), name)
+    if missing:
+        db.session.bulk_insert_mappings(
+            Skill, [{"name": name} for name in missing.values()]
+        )
+        skill_ids.update(
+            (key, skill.id)
+            for key, skill in find_skills(list(missing.values())).items()
+        )
+
+
+def _import_users(archive, chunk_size, count):
+    for chunk in _chunks(_read_member(archive, "user.csv"), chunk_size):
+        db.session.bulk_insert_mappings(
+            User,
+            [
+                {
+                    "username": u[0],
+                    "email": u[1],
+                    "password_hash": u[2],
+                    "admin": u[3] == "True",
+                }
+                for u in chunk
+            ],
+        )
+        count(len(chunk))
+
+
+def _import_skills(archive, chunk_size, count, skill_ids):
+    for chunk in _chunks(_read_member(archive, "skill.csv"), chunk_size):
+        new_skills = {}
+        for s in chunk:
+            key = skill_name_key(s[0])
+            if key not in skill_ids and key not in new_skills:
+                new_skills[key] = {"name": s[0], "explanation": s[1]}
+        db.session.bulk_insert_mappings(Skill, list(new_skills.values()))
+        skill_ids.update(dict.fromkeys(new_skills))
+        count(len(chunk))
+    skill_ids.update(_skill_ids())
+
+
+def _import_projects(archive, chunk_size, count):
+    for chunk in _chunks(_read_member(archive, "project.csv"), chunk_size):
+        db.session.bulk_insert_mappings(
+            Project, [{"name": p[0]} for p in chunk]
+        )
+        count(len(chunk))
+
+
+def _import_sessions(archive, chunk_size, count, skill_ids):
+    user_ids = {id for (id,) in db.session.query(User.id)}
+    project_ids = {id for (id,) in db.session.query(Project.id)}
+    next_id = (db.session.query(db.func.max(Session.id)).scalar() or 0) + 1
+
+    for chunk in _chunks(_read_member(archive, "session.csv"), chunk_size):
+        sessions = []
+        skill_names = []
+        for se in chunk:
+            user_id, project_id = int(se[9]), int(se[10])
+            if user_id not in user_ids:
+                raise ValueError("Unknown user id {}".format(user_id))
+            if project_id not in project_ids:
+                raise ValueError("Unknown project id {}".format(project_id))
+
+            names = parse_skill_names(se[11].replace("|", ","))
+            skill_names.append(names)
+            sessions.append(
+                {
+                    "id": next_id + len(sessions),
+                    "name": se[0],
+                    "duration": int(se[1]),
+                    "level": se[2],
+                    "explanation": se[3],
+                    "created": _parse_datetime(se[4]),
+                    "edited": _parse_datetime(se[5]),
+                    "starttime": _parse_datetime(se[6]),
+                    "endtime": _parse_datetime(se[7]),
+                    "private": se[8] == "True",
+                    "user_id": user_id,
+                    "project_id": project_id,
+                }
+            )
+
+        _insert_missing_skills(
+            {name for names in skill_names for name in names}, skill_ids
+        )
+        db.session.bulk_insert_mappings(Session, sessions)
+        bridges = [
+            {
+                "session_id": se["id"],
+                "skill_id": skill_ids[skill_name_key(name)],
+            }
+            for se, names in zip(sessions, skill_names)
+            for name in names
+        ]
+        if bridges:
+            db.session.execute(bridge_session_skill.insert(), bridges)
+
+        next_id += len(sessions)
+        count(len(chunk))
+
+
+def import_backup(fileobj, chunk_size=5000, progress=None):
+    """Load a backup produced by :func:`iter_backup_zip` in one transaction.
+
+    Each CSV member is streamed out of the archive and inserted with
+    executemany batches of ``chunk_size`` rows. Session ids are assigned
+    from the current maximum, so imports must not run concurrently with
+    other session writes. ``progress`` is called with the running row count
+    after every batch. Returns the number of rows read, the elapsed seconds
+    and the resulting rows per second.
+    """
+    started = time.perf_counter()
+    archive = ZipFile(fileobj, "r")
+    rows = 0
+
+    def count(n):
+        nonlocal rows
+        rows += n
+        if progress is not None:
+            progress(rows)
+
+    try:
+        if not User.query.filter_by(username="admin").first():
+            _import_users(archive, chunk_size, count)
+
+        skill_ids = _skill_ids()
+        _import_skills(archive, chunk_size, count, skill_ids)
+        _import_projects(archive, chunk_size, count)
+        _import_sessions(archive, chunk_size, count, skill_ids)
+        rebuild_rollups()
+        rebuild_search_index()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    seconds = time.perf_counter() - started
+    stats = {
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds else float(rows),
+    }
+    current_app.logger.info(
+        "Imported %(rows)d backup rows in %(seconds).2fs "
+        "(%(rows_per_second).0f rows/s)",
+        stats,
+    )
+    return stats
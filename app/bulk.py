@@ -0,0 +1,207 @@
+"""Create many sessions in one transaction from JSON rows or a CSV upload.
+
+Every row is validated before anything is written. If any row is invalid
+nothing is inserted and the errors are reported per row; otherwise skills
+and projects are resolved with one ``IN`` query each and the sessions,
+rollups and search documents are written together.
+"""
+import csv
+import io
+from datetime import datetime
+
+import pytz
+
+from app import db
+from app.forms import LEVELS, check_times
+from app.models import (
+    Project,
+    Session,
+    create_skills_from_csv_string,
+    parse_skill_names,
+    skill_name_key,
+)
+from app.rollups import add_session_rollups, session_snapshot
+
+CSV_FIELDS = [
+    "name",
+    "duration",
+    "level",
+    "explanation",
+    "project",
+    "skills",
+    "starttime",
+    "endtime",
+    "created",
+    "timezone",
+    "private",
+]
+
+DEFAULT_TIMEZONE = "US/Pacific"
+
+_TRUE = {"1", "true", "yes", "on", "y"}
+
+
+class BulkError(ValueError):
+    """Raised with the per-row errors of a rejected batch."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid field(s)")
+        self.errors = errors
+
+
+def read_csv_rows(fileobj):
+    """Return the rows of an uploaded CSV file as dicts keyed by header."""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        return list(csv.DictReader(text))
+    finally:
+        text.detach()
+
+
+def _text(value):
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def _time(value):
+    value = _text(value)
+    if not value:
+        return None
+    return datetime.strptime(value, "%H:%M")
+
+
+def _clean_row(raw):
+    """Return ``(values, errors)`` for one input row, validated like
+    ``SessionForm``."""
+    if not isinstance(raw, dict):
+        return None, {"row": "Expected an object."}
+
+    values = {}
+    errors = {}
+
+    for field in ("name", "project"):
+        values[field] = _text(raw.get(field))
+        if not values[field]:
+            errors[field] = "This field is required."
+
+    try:
+        values["duration"] = int(_text(raw.get("duration")))
+        if values["duration"] <= 0:
+            raise ValueError
+    except ValueError:
+        errors["duration"] = "Must be a positive whole number of minutes."
+
+    values["level"] = _text(raw.get("level"))
+    if values["level"] not in LEVELS:
+        errors["level"] = "Must be one of: " + ", ".join(LEVELS) + "."
+
+    skills = raw.get("skills")
+    if isinstance(skills, list):
+        skills = ",".join(_text(name) for name in skills)
+    values["skills"] = parse_skill_names(_text(skills))
+    if not values["skills"]:
+        errors["skills"] = "This field is required."
+
+    for field in ("starttime", "endtime"):
+        try:
+            values[field] = _time(raw.get(field))
+        except ValueError:
+            errors[field] = "Not a valid time value (HH:MM)."
+    if "starttime" not in errors and "endtime" not in errors:
+        message = check_times(values["starttime"], values["endtime"])
+        if message:
+            errors["endtime"] = message
+        elif values["starttime"] is None:
+            errors["starttime"] = "This field is required."
+
+    timezone = _text(raw.get("timezone")) or DEFAULT_TIMEZONE
+    created = _text(raw.get("created"))
+    values["created"] = None
+    if created:
+        try:
+            local = pytz.timezone(timezone)
+            day = datetime.strptime(created, "%Y-%m-%d")
+            values["created"] = (
+                local.localize(day, is_dst=None)
+                .astimezone(pytz.utc)
+                .replace(tzinfo=None)
+            )
+        except pytz.UnknownTimeZoneError:
+            errors["timezone"] = "Not a valid timezone."
+        except ValueError:
+            errors["created"] = "Not a valid date value (YYYY-MM-DD)."
+
+    values["explanation"] = _text(raw.get("explanation")) or None
+    private = raw.get("private")
+    if isinstance(private, bool):
+        values["private"] = private
+    else:
+        values["private"] = _text(private).lower() in _TRUE
+
+    return values, errors
+
+
+def _resolve_projects(names):
+    projects = {}
+    for project in Project.query.filter(Project.name.in_(names)).order_by(
+        Project.id
+    ):
+        projects.setdefault(project.name, project)
+    for name in names:
+        if name not in projects:
+            projects[name] = Project(name=name)
+            db.session.add(projects[name])
+    return projects
+
+
+def bulk_create_sessions(rows, user):
+    """Validate ``rows`` and add a session for each to the current
+    transaction, owned by ``user``.
+
+    Raises BulkError listing ``{"row", "field", "message"}`` dicts, with
+    1-based row numbers, if any row is invalid. The caller commits.
+    """
+    cleaned = []
+    errors = []
+    for number, raw in enumerate(rows, start=1):
+        values, row_errors = _clean_row(raw)
+        cleaned.append(values)
+        errors.extend(
+            {"row": number, "field": field, "message": message}
+            for field, message in sorted(row_errors.items())
+        )
+    if errors:
+        raise BulkError(errors)
+
+    skill_names = [name for values in cleaned for name in values["skills"]]
+    skills = {
+        skill_name_key(skill.name): skill
+        for skill in create_skills_from_csv_string(",".join(skill_names))
+    }
+    projects = _resolve_projects(
+        sorted({values["project"] for values in cleaned})
+    )
+
+    sessions = []
+    for values in cleaned:
+        se = Session(
+            name=values["name"],
+            duration=values["duration"],
+            level=values["level"],
+            explanation=values["explanation"],
+            starttime=values["starttime"],
+            endtime=values["endtime"],
+            private=values["private"],
+            author=user,
+            project=projects[values["project"]],
+        )
+        if values["created"] is not None:
+            se.created = values["created"]
+        se.skills = [skills[skill_name_key(name)] for name in values["skills"]]
+        sessions.append(se)
+
+    db.session.add_all(sessions)
+    db.session.flush()
+    add_session_rollups([session_snapshot(se) for se in sessions])
+    return sessions
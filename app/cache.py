@@ -0,0 +1,271 @@
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from urllib.parse import urlencode
+
+from flask import current_app, redirect, request, session, url_for
+from flask_login import current_user
+
+
+class LRUCache(object):
+    """Thread safe least-recently-used cache bounded by approximate bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    sizeof = staticmethod(sys.getsizeof)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._items.move_to_end(key)
+            return self._items[key][0]
+
+    def set(self, key, value, cost=None):
+        if cost is None:
+            cost = self.sizeof(value)
+        with self._lock:
+            if key in self._items:
+                self.size -= self._items.pop(key)[1]
+            if cost > self.max_bytes:
+                return
+            self._items[key] = (value, cost)
+            self.size += cost
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.size -= evicted
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._items:
+                self.size -= self._items.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+
+class MemoryBackend(object):
+    """Keeps responses in a process local LRUCache."""
+
+    def __init__(self, max_bytes):
+        self._cache = LRUCache(max_bytes)
+
+    def get(self, key):
+        entry = self._cache.get(key)
+        if entry is None or entry[0] < time.time():
+            return None
+        return entry[1]
+
+    def set(self, key, value, ttl):
+        cost = len(key) + len(value[2])
+        self._cache.set(key, (time.time() + ttl, value), cost)
+
+    def clear(self):
+        self._cache.clear()
+
+
+class FileSystemBackend(object):
+    """Keeps responses as files in a directory shared by every worker.
+
+    Clearing bumps a generation number that is part of every file name, so
+    workers stop reading stale entries without coordinating with each other.
+    Each file's mtime is its expiry time; every write deletes expired files
+    and then the ones closest to expiring until the directory holds at most
+    ``max_bytes``.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _generation(self):
+        try:
+            with open(os.path.join(self.directory, "generation")) as f:
+                return int(f.read() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _path(self, key):
+        name = f"{self._generation()}:{key}".encode("utf-8")
+        digest = hashlib.sha1(name).hexdigest()
+        return os.path.join(self.directory, digest + ".cache")
+
+    def _write(self, path, data, expires=None):
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        if expires is not None:
+            os.utime(tmp, (expires, expires))
+        os.replace(tmp, path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _prune(self):
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".cache"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if stat.st_mtime < now:
+                self._remove(entry.path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                expires, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires < time.time():
+            return None
+        return value
+
+    def set(self, key, value, ttl):
+        expires = time.time() + ttl
+        entry = pickle.dumps((expires, value))
+        self._write(self._path(key), entry, expires)
+        self._prune()
+
+    def clear(self):
+        generation = str(self._generation() + 1).encode("ascii")
+        self._write(os.path.join(self.directory, "generation"), generation)
+        for name in os.listdir(self.directory):
+            if name.endswith(".cache"):
+                self._remove(os.path.join(self.directory, name))
+
+
+class ResponseCache(object):
+    """Caches the responses anonymous visitors get from public pages, and
+    optionally the ones logged in users get."""
+
+    def __init__(self, app=None):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if app.config["RESPONSE_CACHE_BACKEND"] == "filesystem":
+            backend = FileSystemBackend(
+                app.config["RESPONSE_CACHE_DIR"],
+                app.config["RESPONSE_CACHE_BYTES"],
+            )
+        else:
+            backend = MemoryBackend(app.config["RESPONSE_CACHE_BYTES"])
+        app.extensions["response_cache"] = backend
+
+    @property
+    def backend(self):
+        return current_app.extensions["response_cache"]
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def cached(self, view=None, query_args=(), per_user=False):
+        """Decorate a view to cache its anonymous GET responses.
+
+        Only the ``query_args`` the view reads are part of the key. A request
+        carrying any other argument is redirected to the URL without it, so
+        made-up query strings neither add entries nor reach the view. With
+        ``per_user``, logged in users get their own entries too.
+        """
+        if view is None:
+            return lambda view: self.cached(view, query_args, per_user)
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            ttl = current_app.config["RESPONSE_CACHE_SECONDS"]
+            if (
+                ttl <= 0
+                or request.method != "GET"
+                or (current_user.is_authenticated and not per_user)
+                or "_flashes" in session
+            ):
+                return view(*args, **kwargs)
+
+            given = list(request.args.items(multi=True))
+            used = sorted(item for item in given if item[0] in query_args)
+            query = "?" + urlencode(used) if used else ""
+            if len(used) != len(given):
+                return redirect(
+                    url_for(request.endpoint, **request.view_args) + query
+                )
+
+            key = request.path + query
+            if current_user.is_authenticated:
+                key = f"user {current_user.get_id()} {key}"
+            value = self.backend.get(key)
+            if value is not None:
+                self._count("hits")
+                status, headers, body = value
+                response = current_app.response_class(body, status, headers)
+                return response.make_conditional(request)
+
+            self._count("misses")
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.direct_passthrough:
+                # Lets clients revalidate cached entries with a 304.
+                if "ETag" not in response.headers:
+                    response.add_etag()
+                headers = [
+                    (name, value)
+                    for name, value in response.headers
+                    if name.lower() != "set-cookie"
+                ]
+                value = (200, headers, response.get_data())
+                self.backend.set(key, value, ttl)
+            return response.make_conditional(request)
+
+        return wrapper
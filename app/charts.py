@@ -0,0 +1,20 @@
+"""Plotly figures, kept out of ``app.models`` so that pandas and plotly are
+only imported by the first request that actually draws a chart."""
+import json
+
+import pandas as pd
+import plotly
+import plotly.express as px
+
+
+def skill_minutes_bar(rows):
+    """Return the plotly JSON of a bar chart of ``(skill, minutes)`` rows."""
+    df = pd.DataFrame(
+        {
+            "Skills": [name for name, _ in rows],
+            "Time (min)": [int(minutes) for _, minutes in rows],
+        }
+    )
+
+    fig = px.bar(df, x="Skills", y="Time (min)", barmode="group")
+    return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
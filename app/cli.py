@@ -0,0 +1,93 @@
+import time
+
+import click
+from flask import Blueprint
+
+from app import db
+from app.jobs import cleanup_jobs
+from app.rollups import counter_mismatches, rebuild_counters, rebuild_rollups
+from app.search import rebuild_search_index
+from app.synthetic import generate
+
+bp = Blueprint("cli", __name__, cli_group=None)
+
+
+@bp.cli.command("rebuild-rollups")
+def rebuild_rollups_command():
+    """Recompute the rollup tables from the session table."""
+    rebuild_rollups()
+    db.session.commit()
+    click.echo("Rollup tables rebuilt")
+
+
+@bp.cli.command("reconcile-counters")
+@click.option("--fix", is_flag=True, help="Rewrite the counters that differ.")
+def reconcile_counters_command(fix):
+    """Check the User and Project session counters against the sessions."""
+    mismatches = counter_mismatches()
+    for name, key_id, stored, actual in mismatches:
+        click.echo(f"{name} {key_id}: stored {stored}, actual {actual}")
+
+    if not mismatches:
+        click.echo("Counters are consistent")
+    elif fix:
+        rebuild_counters()
+        db.session.commit()
+        click.echo(f"Fixed {len(mismatches)} counter rows")
+    else:
+        raise click.ClickException(
+            f"{len(mismatches)} counter rows are out of step; "
+            "rerun with --fix to rewrite them"
+        )
+
+
+@bp.cli.command("cleanup-jobs")
+@click.option(
+    "--all",
+    "fail_all",
+    is_flag=True,
+    help="Fail every queued or running job; run it before the workers start.",
+)
+def cleanup_jobs_command(fail_all):
+    """Fail interrupted jobs and delete expired export archives."""
+    cleanup_jobs(fail_all)
+    click.echo("Jobs cleaned up")
+
+
+@bp.cli.command("rebuild-search")
+def rebuild_search_command():
+    """Recreate the full-text search index from the source tables."""
+    rebuild_search_index()
+    db.session.commit()
+    click.echo("Search index rebuilt")
+
+
+@bp.cli.command("generate-data")
+@click.option("--sessions", default=10000, type=click.IntRange(0))
+@click.option("--users", default=5, type=click.IntRange(1))
+@click.option("--projects", default=50, type=click.IntRange(1))
+@click.option("--skills", default=200, type=click.IntRange(1))
+@click.option("--seed", default=0, type=int)
+def generate_data_command(sessions, users, projects, skills, seed):
+    """Append synthetic users, projects, skills and sessions."""
+    started = time.perf_counter()
+    with click.progressbar(length=sessions, label="Sessions") as bar:
+        last = [0]
+
+        def progress(done):
+            bar.update(done - last[0])
+            last[0] = done
+
+        generate(
+            sessions=sessions,
+            users=users,
+            projects=projects,
+            skills=skills,
+            seed=seed,
+            progress=progress,
+        )
+        db.session.commit()
+    click.echo(
+        f"Generated {sessions} sessions in "
+        f"{time.perf_counter() - started:.1f}s"
+    )
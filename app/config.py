@@ -4,6 +4,8 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 
 
 class Config(object):
+    REPLICA_DATABASE_URI = os.environ.get("REPLICA_DATABASE_URI")
+
     if "RDS_HOSTNAME" in os.environ:
         user = os.environ["RDS_USERNAME"]
         passw = os.environ["RDS_PASSWORD"]
@@ -13,11 +15,84 @@ class Config(object):
         SQLALCHEMY_DATABASE_URI = (
             f"mysql+pymysql://{user}:{passw}@{host}:{port}/{db_name}"
         )
+        if not REPLICA_DATABASE_URI and "RDS_REPLICA_HOSTNAME" in os.environ:
+            replica_host = os.environ["RDS_REPLICA_HOSTNAME"]
+            REPLICA_DATABASE_URI = (
+                f"mysql+pymysql://{user}:{passw}@{replica_host}:{port}/"
+                f"{db_name}"
+            )
+
+        # Recycle connections before the server or a NAT in between drops
+        # them for idling, and ping on checkout to catch the ones it did.
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            "pool_size": int(os.environ.get("DB_POOL_SIZE") or 5),
+            "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW") or 10),
+            "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT") or 30),
+            "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE") or 280),
+            "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "1") != "0",
+        }
     else:
         SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(
             basedir, "app.db"
         )
 
+    if REPLICA_DATABASE_URI:
+        SQLALCHEMY_BINDS = {"replica": REPLICA_DATABASE_URI}
+
+    DB_POOL_LOG_SECONDS = float(os.environ.get("DB_POOL_LOG_SECONDS") or 0)
+
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED") == "1"
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+    METRICS_SLOW_STATEMENTS = int(
+        os.environ.get("METRICS_SLOW_STATEMENTS") or 10
+    )
+    SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS") or 0)
+
     SECRET_KEY = os.environ.get("SECRET_KEY") or "test_secret_key"
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    PAGE_SIZE = int(os.environ.get("PAGE_SIZE") or 20)
+    MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE") or 100)
+
+    INDEX_LATEST = int(os.environ.get("INDEX_LATEST") or 3)
+
+    RESPONSE_CACHE_SECONDS = float(
+        os.environ.get("RESPONSE_CACHE_SECONDS") or 30
+    )
+    RESPONSE_CACHE_BACKEND = (
+        os.environ.get("RESPONSE_CACHE_BACKEND") or "memory"
+    )
+    RESPONSE_CACHE_BYTES = int(
+        os.environ.get("RESPONSE_CACHE_BYTES") or 32 * 1024 * 1024
+    )
+    RESPONSE_CACHE_DIR = os.environ.get("RESPONSE_CACHE_DIR") or os.path.join(
+        os.path.dirname(basedir), "cache"
+    )
+
+    CHART_CACHE_BYTES = int(
+        os.environ.get("CHART_CACHE_BYTES") or 16 * 1024 * 1024
+    )
+    CHART_MAX_AGE = int(os.environ.get("CHART_MAX_AGE") or 0)
+
+    SEARCH_PAGE_SIZE = int(os.environ.get("SEARCH_PAGE_SIZE") or 20)
+
+    ACTIVITY_MAX_BUCKETS = int(os.environ.get("ACTIVITY_MAX_BUCKETS") or 1000)
+
+    BULK_MAX_ROWS = int(os.environ.get("BULK_MAX_ROWS") or 1000)
+
+    BACKUP_YIELD_PER = int(os.environ.get("BACKUP_YIELD_PER") or 1000)
+    IMPORT_CHUNK_SIZE = int(os.environ.get("IMPORT_CHUNK_SIZE") or 5000)
+
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS") or 1)
+    JOB_DIR = os.environ.get("JOB_DIR") or os.path.join(
+        os.path.dirname(basedir), "jobs"
+    )
+    # Rows between progress writes to the job table.
+    JOB_PROGRESS_ROWS = int(os.environ.get("JOB_PROGRESS_ROWS") or 5000)
+    # Queued or running jobs not updated for this long are marked failed.
+    JOB_STALE_SECONDS = int(os.environ.get("JOB_STALE_SECONDS") or 60 * 60)
+    # Export archives are deleted this long after they finish.
+    JOB_EXPORT_SECONDS = int(
+        os.environ.get("JOB_EXPORT_SECONDS") or 24 * 60 * 60
+    )
@@ -0,0 +1,128 @@
+"""Engine selection and connection pool monitoring.
+
+When a ``replica`` bind is configured, GET and HEAD requests run their
+queries against it. Writes go to the primary, and so does everything after
+the first write of a request, so a handler always reads what it just wrote.
+GET views that write, like the delete links, are marked ``use_primary``.
+"""
+import os
+import time
+from functools import wraps
+
+from flask import (
+    current_app,
+    g,
+    has_app_context,
+    has_request_context,
+    request,
+)
+from flask_sqlalchemy import SignallingSession, SQLAlchemy, get_state
+from sqlalchemy import event, exc, orm
+from sqlalchemy.pool import Pool
+
+REPLICA = "replica"
+
+
+class RoutingSession(SignallingSession):
+    def _use_replica(self, clause):
+        if not has_request_context() or not g.get("use_replica"):
+            return False
+        if REPLICA not in (self.app.config.get("SQLALCHEMY_BINDS") or {}):
+            return False
+        writing = clause is not None and getattr(clause, "is_dml", False)
+        if writing or self._flushing or self.new or self.dirty or self.deleted:
+            g.use_replica = False
+            return False
+        return True
+
+    def get_bind(self, mapper=None, clause=None):
+        if self._use_replica(clause):
+            return get_state(self.app).db.get_engine(self.app, bind=REPLICA)
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+def route_reads():
+    """``before_request`` hook sending the reads of safe methods to the
+    replica."""
+    g.use_replica = request.method in ("GET", "HEAD")
+
+
+def use_primary(view):
+    """Keep every query of a view that writes on a GET on the primary."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.use_replica = False
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def pool_status(db, app=None):
+    """Return ``{bind: pool status}`` for the primary and every bind."""
+    app = app or current_app
+    binds = [None] + list(app.config.get("SQLALCHEMY_BINDS") or {})
+    return {
+        bind or "primary": db.get_engine(app, bind=bind).pool.status()
+        for bind in binds
+    }
+
+
+def dispose_engines(db, app):
+    """Give this process new, empty connection pools.
+
+    Call it in a worker right after fork(). The inherited pools are dropped
+    without closing their connections, which still belong to the parent.
+    """
+    binds = [None] + list(app.config.get("SQLALCHEMY_BINDS") or {})
+    for bind in binds:
+        engine = db.get_engine(app, bind=bind)
+        engine.pool = engine.pool.recreate()
+
+
+@event.listens_for(Pool, "connect")
+def _remember_pid(dbapi_connection, record):
+    record.info["pid"] = os.getpid()
+
+
+@event.listens_for(Pool, "checkout")
+def _refuse_inherited(dbapi_connection, record, proxy):
+    # A connection opened before a fork that dispose_engines missed is
+    # shared with another process; make the pool open a fresh one instead.
+    if record.info.get("pid", os.getpid()) != os.getpid():
+        record.dbapi_connection = proxy.dbapi_connection = None
+        raise exc.DisconnectionError(
+            "Connection belongs to pid %s" % record.info["pid"]
+        )
+
+
+_last_pool_log = [0.0]
+
+
+def log_pool_status(db):
+    """Log pool statistics at most once every DB_POOL_LOG_SECONDS."""
+    interval = current_app.config["DB_POOL_LOG_SECONDS"]
+    now = time.monotonic()
+    if interval <= 0 or now - _last_pool_log[0] < interval:
+        return
+    _last_pool_log[0] = now
+    for bind, status in pool_status(db).items():
+        current_app.logger.info("Connection pool %s: %s", bind, status)
+
+
+@event.listens_for(Pool, "checkout")
+def _warn_when_exhausted(dbapi_connection, record, proxy):
+    # Only QueuePool has a size; the SQLite pools never block.
+    pool = proxy._pool
+    if not hasattr(pool, "overflow") or pool._max_overflow < 0:
+        return
+    if pool.checkedout() >= pool.size() + pool._max_overflow:
+        if has_app_context():
+            current_app.logger.warning(
+                "Connection pool exhausted: %s", pool.status()
+            )
@@ -1,5 +1,5 @@
 from flask_wtf import FlaskForm
-from flask_wtf.file import FileField
+from flask_wtf.file import FileField, FileRequired
 from wtforms import (
     BooleanField,
     DateTimeField,
@@ -16,6 +16,22 @@ from wtforms.validators import DataRequired, Optional, ValidationError
 
 import pytz
 
+LEVELS = ["untrained", "basic", "intermediate", "advanced", "master"]
+
+
+def check_times(starttime, endtime):
+    """Return why a start/end time pair is invalid, or None if it is not."""
+    need_both_msg = "Either, fill out both Start and End time, or neither."
+    end_smaller_msg = "End Time must not be earlier than Start Time."
+    if endtime is None and starttime is not None:
+        return need_both_msg
+    elif endtime is not None and starttime is None:
+        return need_both_msg
+    elif endtime is not None and starttime is not None:
+        if endtime < starttime:
+            return end_smaller_msg
+    return None
+
 
 class LoginForm(FlaskForm):
     username = StringField("Username", validators=[DataRequired()])
@@ -44,7 +60,7 @@ class SessionForm(FlaskForm):
     level = SelectField(
         "Level",
         validators=[DataRequired()],
-        choices=["untrained", "basic", "intermediate", "advanced", "master"],
+        choices=LEVELS,
     )
     explanation = TextAreaField("[optional] Explanation")
     timezone = SelectField(
@@ -76,15 +92,9 @@ class SessionForm(FlaskForm):
     submit = SubmitField("Submit")
 
     def validate_endtime(form, field):
-        need_both_msg = "Either, fill out both Start and End time, or neither."
-        end_smaller_msg = "End Time must not be earlier than Start Time."
-        if field.data is None and form.starttime.data is not None:
-            raise ValidationError(need_both_msg)
-        elif field.data is not None and form.starttime.data is None:
-            raise ValidationError(need_both_msg)
-        elif field.data is not None and form.starttime.data is not None:
-            if field.data < form.starttime.data:
-                raise ValidationError(end_smaller_msg)
+        message = check_times(form.starttime.data, field.data)
+        if message:
+            raise ValidationError(message)
 
 
 class SkillForm(FlaskForm):
@@ -96,3 +106,8 @@ class SkillForm(FlaskForm):
 class ImportBackupForm(FlaskForm):
     file = FileField("Backup File")
     submit = SubmitField("Submit")
+
+
+class BulkSessionForm(FlaskForm):
+    file = FileField("Sessions CSV", validators=[FileRequired()])
+    submit = SubmitField("Submit")
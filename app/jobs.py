@@ -0,0 +1,272 @@
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import exc
+
+from app import db, response_cache
+from app.backup import import_backup, iter_backup_zip
+from app.models import Job
+
+# Live row counts of jobs running in this process. Every JOB_PROGRESS_ROWS
+# rows they are also written to the job table for the other workers.
+_progress = {}
+_futures = {}
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config["JOB_WORKERS"],
+                thread_name_prefix="job",
+            )
+        return _executor
+
+
+def _reset_after_fork():
+    # Threads do not survive fork(), so a child process that inherited the
+    # pool, e.g. a preloaded gunicorn worker, has to start its own.
+    global _executor, _lock
+    _executor = None
+    _lock = threading.Lock()
+    _futures.clear()
+    _progress.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _owner():
+    return "{}:{}".format(socket.gethostname(), os.getpid())
+
+
+def _owner_alive(owner):
+    # Only processes on this host can be checked; the others are judged by
+    # their job's update stamp alone.
+    host, _, pid = (owner or "").rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def cleanup_jobs(fail_all=False):
+    """Fail jobs lost with the process running them and delete expired
+    export archives.
+
+    Runs before every new job and whenever the job pages are viewed, and
+    from ``flask cleanup-jobs`` when the app starts. Jobs are stale after
+    JOB_STALE_SECONDS without an update, unless they are running in a live
+    process on this host: an import on SQLite can't update its job until it
+    commits. ``fail_all`` fails every queued or running job, for use before
+    the workers start.
+    """
+    config = current_app.config
+    now = datetime.utcnow()
+    stale_seconds = 0 if fail_all else config["JOB_STALE_SECONDS"]
+
+    stale = Job.query.filter(
+        Job.status.in_(("queued", "running")),
+        Job.id.notin_(list(_futures)),
+        db.func.coalesce(Job.updated, Job.created)
+        < now - timedelta(seconds=stale_seconds),
+    )
+    for job in stale:
+        if (
+            not fail_all
+            and job.status == "running"
+            and _owner_alive(job.owner)
+        ):
+            continue
+        if job.kind == "import" and job.path:
+            _remove(job.path)
+        if job.kind == "export":
+            _remove(job_file(job.id, "zip") + ".part")
+        job.status = "failed"
+        job.message = "Job was interrupted"
+        job.path = None
+        job.finished = now
+
+    expired = Job.query.filter(
+        Job.kind == "export",
+        Job.path.isnot(None),
+        Job.finished < now - timedelta(seconds=config["JOB_EXPORT_SECONDS"]),
+    )
+    for job in expired:
+        _remove(job.path)
+        job.path = None
+        job.message = "Backup expired"
+
+    db.session.commit()
+
+
+def job_file(job_id, suffix):
+    os.makedirs(current_app.config["JOB_DIR"], exist_ok=True)
+    return os.path.join(
+        current_app.config["JOB_DIR"], "job-{}.{}".format(job_id, suffix)
+    )
+
+
+def submit_job(kind, user, upload=None):
+    """Record a queued job and hand it to the worker pool.
+
+    ``upload`` is the backup file of an import; it is saved next to the
+    export archives because the request stream is gone once the worker runs.
+    """
+    cleanup_jobs()
+    job = Job(kind=kind, user_id=user.id)
+    db.session.add(job)
+    db.session.commit()
+
+    if upload is not None:
+        job.path = job_file(job.id, "upload.zip")
+        upload.save(job.path)
+        db.session.commit()
+
+    _futures[job.id] = _get_executor().submit(
+        _run_job, current_app._get_current_object(), job.id
+    )
+    return job
+
+
+def wait_for_job(job_id, timeout=None):
+    future = _futures.get(job_id)
+    if future is not None:
+        future.result(timeout)
+
+
+def job_progress(job):
+    return _progress.get(job.id, job.progress)
+
+
+def job_status(job):
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": job_progress(job),
+        "message": job.message,
+        "download": job.kind == "export"
+        and job.status == "finished"
+        and job.path is not None,
+        "created": job.created.isoformat(),
+        "finished": job.finished.isoformat() if job.finished else None,
+    }
+
+
+def _save_progress(job_id, rows):
+    # A connection of its own commits the count while the job's transaction
+    # is still open.
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(
+                Job.__table__.update()
+                .where(Job.id == job_id)
+                .values(progress=rows)
+            )
+    except exc.OperationalError:
+        current_app.logger.warning(
+            "Could not save the progress of job %s", job_id, exc_info=True
+        )
+        return False
+    return True
+
+
+def _report(job_id, save=True):
+    every = current_app.config["JOB_PROGRESS_ROWS"]
+    saved = 0 if save else None
+
+    def report(rows):
+        nonlocal saved
+        _progress[job_id] = rows
+        if saved is not None and rows - saved >= every:
+            saved = rows if _save_progress(job_id, rows) else None
+
+    return report
+
+
+def _run_export(job):
+    path = job_file(job.id, "zip")
+    try:
+        with open(path + ".part", "wb") as backup:
+            for chunk in iter_backup_zip(
+                current_app.config["BACKUP_YIELD_PER"],
+                progress=_report(job.id),
+            ):
+                backup.write(chunk)
+    except Exception:
+        _remove(path + ".part")
+        raise
+    os.replace(path + ".part", path)
+    job.path = path
+    job.message = "Backup ready"
+
+
+def _run_import(job):
+    try:
+        with open(job.path, "rb") as upload:
+            stats = import_backup(
+                upload,
+                current_app.config["IMPORT_CHUNK_SIZE"],
+                # SQLite allows one writer, and the import holds it until it
+                # commits, so there only this process sees its progress.
+                progress=_report(
+                    job.id, save=db.engine.dialect.name != "sqlite"
+                ),
+            )
+    finally:
+        os.remove(job.path)
+    job.path = None
+    response_cache.clear()
+    job.message = (
+        "Imported {rows} rows in {seconds:.2f}s "
+        "({rows_per_second:.0f} rows/s)".format(**stats)
+    )
+
+
+_RUNNERS = {"export": _run_export, "import": _run_import}
+
+
+def _run_job(app, job_id):
+    with app.app_context():
+        job = Job.query.get(job_id)
+        job.status = "running"
+        job.owner = _owner()
+        db.session.commit()
+
+        try:
+            _RUNNERS[job.kind](job)
+            job.status = "finished"
+        except Exception as e:
+            app.logger.exception("Job %s failed", job_id)
+            db.session.rollback()
+            job = Job.query.get(job_id)
+            job.status = "failed"
+            job.message = str(e)
+            if job.kind == "import":
+                job.path = None
+
+        job.progress = _progress.pop(job_id, job.progress)
+        job.finished = datetime.utcnow()
+        db.session.commit()
+        db.session.remove()
+        _futures.pop(job_id, None)
@@ -0,0 +1,139 @@
+"""Query helpers shared by the HTML views and the JSON API.
+
+They read the paging and filter arguments of the current request.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask import abort, current_app, request, url_for
+
+from app import db
+from app.models import Session, bridge_session_skill
+
+Page = namedtuple("Page", ["items", "older_url", "newer_url"])
+
+# The request arguments read by keyset_page and filter_sessions.
+PAGE_ARGS = ("before", "limit")
+SESSION_FILTER_ARGS = (
+    "level",
+    "user",
+    "project",
+    "skill",
+    "start",
+    "end",
+    "min_duration",
+)
+
+
+def page_url_for(**changes):
+    """Return the current URL with ``changes`` applied to its arguments."""
+    args = request.args.to_dict()
+    args.update(changes)
+    return url_for(
+        request.endpoint,
+        **request.view_args,
+        **{k: v for k, v in args.items() if v is not None},
+    )
+
+
+def _page_url(before):
+    return page_url_for(before=before)
+
+
+def keyset_page(query, model):
+    """Return one page of ``query`` ordered by ``model.id`` descending.
+
+    Navigation uses ``?before=<id>`` cursors instead of offsets, so every
+    page costs the same primary key range scan no matter how deep it is.
+    """
+    limit = request.args.get(
+        "limit", current_app.config["PAGE_SIZE"], type=int
+    )
+    limit = max(1, min(limit, current_app.config["MAX_PAGE_SIZE"]))
+    before = request.args.get("before", type=int)
+
+    page_query = query.order_by(model.id.desc())
+    if before is not None:
+        page_query = page_query.filter(model.id < before)
+    items = page_query.limit(limit + 1).all()
+
+    older_url = None
+    if len(items) > limit:
+        items = items[:limit]
+        older_url = _page_url(items[-1].id)
+
+    newer_url = None
+    if before is not None:
+        newer = (
+            query.with_entities(model.id)
+            .filter(model.id >= before)
+            .order_by(model.id.asc())
+            .limit(limit + 1)
+            .all()
+        )
+        if len(newer) > limit:
+            newer_url = _page_url(newer[limit].id)
+        elif newer:
+            newer_url = _page_url(None)
+
+    return Page(items, older_url, newer_url)
+
+
+def with_session_relations(query):
+    # Cards show the author and skill names of every session; load them in
+    # two bulk statements instead of two lazy loads per card.
+    return query.options(
+        db.joinedload(Session.author), db.selectinload(Session.skills)
+    )
+
+
+def date_arg(name, default):
+    """Return the ``YYYY-MM-DD`` request argument ``name`` as a date, or
+    ``default`` when it is missing. Aborts with 400 when it is invalid."""
+    value = request.args.get(name)
+    if not value:
+        return default
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        abort(400)
+
+
+def filter_sessions(query):
+    """Apply the ``/session/all`` filter arguments as indexed predicates."""
+    args = request.args
+
+    level = args.get("level")
+    if level:
+        query = query.filter(Session.level == level)
+
+    for arg, column in (
+        ("user", Session.user_id),
+        ("project", Session.project_id),
+    ):
+        value = args.get(arg, type=int)
+        if value is not None:
+            query = query.filter(column == value)
+
+    skill_id = args.get("skill", type=int)
+    if skill_id is not None:
+        query = query.filter(
+            Session.id.in_(
+                db.select([bridge_session_skill.c.session_id]).where(
+                    bridge_session_skill.c.skill_id == skill_id
+                )
+            )
+        )
+
+    start = date_arg("start", None)
+    if start is not None:
+        query = query.filter(Session.created >= start)
+    end = date_arg("end", None)
+    if end is not None:
+        query = query.filter(Session.created < end + timedelta(days=1))
+
+    min_duration = args.get("min_duration", type=int)
+    if min_duration is not None:
+        query = query.filter(Session.duration >= min_duration)
+
+    return query
@@ -0,0 +1,246 @@
+"""Opt-in request and query instrumentation.
+
+With METRICS_ENABLED set, every request adds its latency to a histogram for
+its endpoint, along with the number of SQL statements it ran. The slowest
+statements are kept too. Admins see them at ``/admin/metrics``. Prometheus
+can scrape ``/metrics`` with the bearer token in METRICS_TOKEN, and the
+endpoint is not served without one. Requests slower than SLOW_REQUEST_MS are
+logged.
+
+The numbers are kept in memory, so each worker process reports its own.
+"""
+import heapq
+import threading
+import time
+
+from flask import (
+    Blueprint,
+    abort,
+    current_app,
+    g,
+    has_app_context,
+    has_request_context,
+    render_template,
+    request,
+)
+from flask_login import current_user, login_required
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+bp = Blueprint("metrics", __name__)
+
+
+class EndpointStats(object):
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.queries = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms, queries):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.queries += queries
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, fraction):
+        """Return the upper bound of the bucket holding the given fraction
+        of requests, or None when it is past the last bound."""
+        seen = 0
+        for bound, n in zip(BUCKETS_MS, self.buckets):
+            seen += n
+            if seen >= fraction * self.count:
+                return bound
+        return None
+
+
+class Recorder(object):
+    """Per-app store of endpoint stats and the slowest statements."""
+
+    def __init__(self, keep_statements=10):
+        self.keep_statements = keep_statements
+        self.endpoints = {}
+        self.statements = []
+        self._lock = threading.Lock()
+
+    def record_request(self, endpoint, ms, queries):
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats()
+            stats.add(ms, queries)
+
+    def record_statement(self, statement, ms, endpoint):
+        entry = (ms, statement, endpoint)
+        with self._lock:
+            if len(self.statements) < self.keep_statements:
+                heapq.heappush(self.statements, entry)
+            elif ms > self.statements[0][0]:
+                heapq.heapreplace(self.statements, entry)
+
+    def slowest_statements(self):
+        with self._lock:
+            return sorted(self.statements, reverse=True)
+
+    def prometheus(self):
+        """Render the stats in the Prometheus text exposition format."""
+        lines = [
+            "# HELP portfolio_request_duration_seconds "
+            "Request latency by endpoint.",
+            "# TYPE portfolio_request_duration_seconds histogram",
+        ]
+        queries = [
+            "# HELP portfolio_db_queries_total "
+            "SQL statements run by requests, by endpoint.",
+            "# TYPE portfolio_db_queries_total counter",
+        ]
+        with self._lock:
+            for endpoint, stats in sorted(self.endpoints.items()):
+                label = f'endpoint="{endpoint}"'
+                cumulative = 0
+                for bound, n in zip(BUCKETS_MS, stats.buckets):
+                    cumulative += n
+                    lines.append(
+                        "portfolio_request_duration_seconds_bucket"
+                        f'{{{label},le="{bound / 1000:g}"}} {cumulative}'
+                    )
+                lines.append(
+                    "portfolio_request_duration_seconds_bucket"
+                    f'{{{label},le="+Inf"}} {stats.count}'
+                )
+                lines.append(
+                    "portfolio_request_duration_seconds_sum"
+                    f"{{{label}}} {stats.total_ms / 1000:.6f}"
+                )
+                lines.append(
+                    "portfolio_request_duration_seconds_count"
+                    f"{{{label}}} {stats.count}"
+                )
+                queries.append(
+                    f"portfolio_db_queries_total{{{label}}} {stats.queries}"
+                )
+        return "\n".join(lines + queries) + "\n"
+
+
+def _recorder():
+    if has_app_context():
+        return current_app.extensions.get("metrics")
+    return None
+
+
+def _endpoint():
+    return request.endpoint or "unmatched"
+
+
+def _start_request():
+    g.metrics_start = time.perf_counter()
+    g.metrics_queries = 0
+
+
+def _finish_request(response):
+    start = g.pop("metrics_start", None)
+    if start is None:
+        return response
+    ms = (time.perf_counter() - start) * 1000
+    queries = g.pop("metrics_queries", 0)
+    current_app.extensions["metrics"].record_request(_endpoint(), ms, queries)
+
+    threshold = current_app.config["SLOW_REQUEST_MS"]
+    if threshold > 0 and ms > threshold:
+        current_app.logger.warning(
+            "Slow request: %s %s took %.0f ms and ran %d queries",
+            request.method,
+            request.full_path,
+            ms,
+            queries,
+        )
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, *args):
+    if _recorder() is not None:
+        conn.info.setdefault("metrics_start", {})[cursor] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, *args):
+    recorder = _recorder()
+    start = conn.info.get("metrics_start", {}).pop(cursor, None)
+    if recorder is None or start is None:
+        return
+    ms = (time.perf_counter() - start) * 1000
+    endpoint = None
+    if has_request_context():
+        g.metrics_queries = g.get("metrics_queries", 0) + 1
+        endpoint = _endpoint()
+    recorder.record_statement(statement, ms, endpoint)
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start
+    # time so it does not stay on the pooled connection.
+    cursor = getattr(context.execution_context, "cursor", None)
+    if context.connection is not None and cursor is not None:
+        context.connection.info.get("metrics_start", {}).pop(cursor, None)
+
+
+def init_app(app):
+    """Instrument ``app`` if METRICS_ENABLED is set."""
+    if not app.config["METRICS_ENABLED"]:
+        return
+    app.extensions["metrics"] = Recorder(app.config["METRICS_SLOW_STATEMENTS"])
+    # Registered first so the timing wraps the other request hooks.
+    app.before_request_funcs.setdefault(None, []).insert(0, _start_request)
+    app.after_request_funcs.setdefault(None, []).insert(0, _finish_request)
+
+    if not event.contains(
+        Engine, "before_cursor_execute", _before_cursor_execute
+    ):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+def _enabled_recorder():
+    recorder = _recorder()
+    if recorder is None:
+        abort(404)
+    return recorder
+
+
+@bp.route("/admin/metrics")
+@login_required
+def admin_metrics():
+    recorder = _enabled_recorder()
+    if not current_user.admin:
+        abort(403)
+    return render_template(
+        "metrics.html",
+        title="Metrics",
+        endpoints=sorted(
+            recorder.endpoints.items(),
+            key=lambda item: item[1].total_ms,
+            reverse=True,
+        ),
+        statements=recorder.slowest_statements(),
+    )
+
+
+@bp.route("/metrics")
+def prometheus():
+    recorder = _enabled_recorder()
+    token = current_app.config["METRICS_TOKEN"]
+    if not token:
+        abort(404)
+    if request.headers.get("Authorization") != f"Bearer {token}":
+        abort(401)
+    return current_app.response_class(
+        recorder.prometheus(), mimetype="text/plain; version=0.0.4"
+    )
@@ -1,14 +1,22 @@
+import sqlite3
+import unicodedata
 from datetime import datetime
 
 from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import Pool
 from werkzeug.security import check_password_hash, generate_password_hash
 
-from app import db, login
+from app import chart_cache, db, login
 
-import pandas as pd
 import json
-import plotly
-import plotly.express as px
+
+
+# MySQL's plain DATETIME drops fractions of a second. The edit stamps key
+# cached charts and API validators, so two edits in one second must differ.
+EditStamp = db.DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql")
 
 
 @login.user_loader
@@ -25,6 +33,15 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(128), nullable=False)
     admin = db.Column(db.Boolean, default=False, nullable=False)
 
+    # Kept in step with the session table by app.rollups
+    session_count = db.Column(
+        db.Integer, default=0, server_default="0", nullable=False
+    )
+    total_minutes = db.Column(
+        db.Integer, default=0, server_default="0", nullable=False
+    )
+    last_activity = db.Column(db.DateTime, nullable=True)
+
     # Foreign Keys
 
     # Methods to access relationships
@@ -48,10 +65,17 @@ bridge_session_skill = db.Table(
     db.Column(
         "skill_id", db.Integer, db.ForeignKey("skill.id"), primary_key=True
     ),
+    db.Index("ix_bridge_session_skill_skill_id", "skill_id", "session_id"),
 )
 
 
 class Session(db.Model):
+    __table_args__ = (
+        # Listings filter by owner and page by id descending.
+        db.Index("ix_session_user_id_id", "user_id", "id"),
+        db.Index("ix_session_project_id_id", "project_id", "id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), index=True, nullable=False)
     duration = db.Column(db.Integer, nullable=False)
@@ -62,7 +86,7 @@ class Session(db.Model):
         db.DateTime, index=True, default=datetime.utcnow, nullable=False
     )
     edited = db.Column(
-        db.DateTime,
+        EditStamp,
         index=True,
         default=datetime.utcnow,
         onupdate=datetime.utcnow,
@@ -83,7 +107,7 @@ class Session(db.Model):
     skills = db.relationship(
         "Skill",
         secondary=bridge_session_skill,
-        lazy="dynamic",
+        lazy="select",
         backref=db.backref("sessions", lazy=True),
     )
 
@@ -91,12 +115,46 @@ class Session(db.Model):
         return "<Session {}>".format(self.name)
 
     def get_skill_list_string(self):
-        return ",".join([skill.name for skill in self.skills.all()])
+        return ",".join([skill.name for skill in self.skills])
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "duration": self.duration,
+            "level": self.level,
+            "explanation": self.explanation,
+            "created": self.created.isoformat(),
+            "edited": self.edited.isoformat(),
+            "starttime": self.starttime.isoformat(),
+            "endtime": self.endtime.isoformat(),
+            "private": self.private,
+            "user_id": self.user_id,
+            "project_id": self.project_id,
+            "skills": [skill.name for skill in self.skills],
+        }
 
 
 class Project(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), index=True, nullable=False)
+    # Bumped on every change so API validators see renames
+    edited = db.Column(
+        EditStamp,
+        index=True,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False,
+    )
+
+    # Kept in step with the session table by app.rollups
+    session_count = db.Column(
+        db.Integer, default=0, server_default="0", nullable=False
+    )
+    total_minutes = db.Column(
+        db.Integer, default=0, server_default="0", nullable=False
+    )
+    last_activity = db.Column(db.DateTime, nullable=True)
 
     # Methods to access relationships
     sessions = db.relationship("Session", backref="project", lazy="dynamic")
@@ -104,47 +162,275 @@ class Project(db.Model):
     def __repr__(self):
         return "<Project {}>".format(self.name)
 
-    def get_graphJSON(self):
-        skills = []
-        times = []
-        for se in self.sessions.all():
-            for sk in se.skills.all():
-                skills.append(sk.name)
-                times.append(se.duration)
-
-        df = pd.DataFrame(
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "session_count": self.session_count,
+            "total_minutes": self.total_minutes,
+            "last_activity": (
+                self.last_activity.isoformat() if self.last_activity else None
+            ),
+        }
+
+    def get_skill_minutes(self):
+        """Return ``(skill name, total minutes)`` rows for this project."""
+        return (
+            db.session.query(Skill.name, db.func.sum(Session.duration))
+            .join(
+                bridge_session_skill,
+                bridge_session_skill.c.skill_id == Skill.id,
+            )
+            .join(Session, Session.id == bridge_session_skill.c.session_id)
+            .filter(Session.project_id == self.id)
+            .group_by(Skill.id, Skill.name)
+            .order_by(Skill.name)
+            .all()
+        )
+
+    def _chart_key(self, kind):
+        # Every session write updates the project's counters and with them
+        # its edited stamp; skill renames and deletions change the labels.
+        # The key comes from the database, so every worker sees a write.
+        skills = db.session.query(
+            db.func.max(Skill.edited), db.func.count(Skill.id)
+        ).one()
+        return (
+            kind,
+            self.id,
+            self.edited,
+            self.session_count,
+            self.total_minutes,
+            *skills,
+        )
+
+    def _cached_chart(self, kind, build):
+        key = self._chart_key(kind)
+        value = chart_cache.get(key)
+        if value is None:
+            value = build()
+            chart_cache.set(key, value)
+        return value
+
+    def get_chart_series_json(self):
+        """Return the skill/minutes series as a JSON document."""
+        return self._cached_chart("series", self._build_chart_series_json)
+
+    def _build_chart_series_json(self):
+        rows = self.get_skill_minutes()
+        return json.dumps(
             {
-                "Skills": skills,
-                "Time (min)": times,
+                "project_id": self.id,
+                "skills": [name for name, _ in rows],
+                "minutes": [int(minutes) for _, minutes in rows],
             }
         )
 
-        fig = px.bar(df, x="Skills", y="Time (min)", barmode="group")
-        graphJSON = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
-        return graphJSON
+    def get_graphJSON(self):
+        return self._cached_chart("plotly", self._build_graphJSON)
+
+    def _build_graphJSON(self):
+        from app.charts import skill_minutes_bar
+
+        return skill_minutes_bar(self.get_skill_minutes())
 
 
 class Skill(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(120), index=True, nullable=False)
+    name = db.Column(db.String(120), index=True, unique=True, nullable=False)
     explanation = db.Column(db.Text, nullable=True)
+    # Bumped on every change so API validators see renames
+    edited = db.Column(
+        EditStamp,
+        index=True,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False,
+    )
 
     def __repr__(self):
         return "<Skill {}>".format(self.name)
 
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "explanation": self.explanation,
+            "total_minutes": self.stats.total_minutes if self.stats else 0,
+            "session_count": self.stats.session_count if self.stats else 0,
+        }
 
-def create_skills_from_csv_string(csv):
-    potential = csv.split(",")
-    skill_objects = []
 
-    for p in potential:
-        p = p.strip()
-        exists = Skill.query.filter_by(name=p).first()
-        if exists is None:
-            exists = Skill(name=p)
-            db.session.add(exists)
-            db.session.commit()
+class SkillStats(db.Model):
+    __tablename__ = "skill_stats"
+
+    skill_id = db.Column(
+        db.Integer, db.ForeignKey("skill.id"), primary_key=True
+    )
+    total_minutes = db.Column(db.Integer, default=0, nullable=False)
+    session_count = db.Column(db.Integer, default=0, nullable=False)
+    first_seen = db.Column(db.DateTime, nullable=True)
+    last_seen = db.Column(db.DateTime, nullable=True)
+
+    # Methods to access relationships
+    skill = db.relationship(
+        "Skill",
+        backref=db.backref(
+            "stats", uselist=False, cascade="all, delete-orphan"
+        ),
+    )
 
-        skill_objects.append(exists)
+    def __repr__(self):
+        return "<SkillStats {}>".format(self.skill_id)
+
+
+class ActivityRollup(db.Model):
+    __tablename__ = "activity_rollup"
+
+    # One row per (user|project|skill, id) and day/week/month bucket, keyed
+    # so a time series for one entity is a primary key range scan.
+    dimension = db.Column(db.String(8), primary_key=True)
+    key_id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(8), primary_key=True)
+    bucket = db.Column(db.Date, primary_key=True)
+    total_minutes = db.Column(db.Integer, default=0, nullable=False)
+    session_count = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return "<ActivityRollup {} {} {} {}>".format(
+            self.dimension, self.key_id, self.period, self.bucket
+        )
+
+
+class Job(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(16), nullable=False)
+    status = db.Column(
+        db.String(16), index=True, default="queued", nullable=False
+    )
+    progress = db.Column(db.Integer, default=0, nullable=False)
+    message = db.Column(db.Text, nullable=True)
+    path = db.Column(db.String(255), nullable=True)
+
+    created = db.Column(
+        db.DateTime, index=True, default=datetime.utcnow, nullable=False
+    )
+    finished = db.Column(db.DateTime, nullable=True)
+    # Bumped by every status and progress write; a queued or running job
+    # whose stamp stops moving was lost with the process running it.
+    updated = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=True,
+    )
+    # "host:pid" of the worker process running the job
+    owner = db.Column(db.String(255), nullable=True)
+
+    # Foreign Keys
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+
+    def __repr__(self):
+        return "<Job {} {}>".format(self.kind, self.status)
+
+    @property
+    def done(self):
+        return self.status in ("finished", "failed")
+
+
+def skill_name_key(name):
+    """Return the form of a skill name that the unique index compares.
+
+    MySQL's default collations ignore case, accents and trailing spaces, so
+    "Python", "python " and "PYTHON" are one skill.
+    """
+    decomposed = unicodedata.normalize("NFKD", name.strip())
+    return "".join(
+        c for c in decomposed if not unicodedata.combining(c)
+    ).casefold()
+
+
+@event.listens_for(Pool, "connect")
+def _register_skill_name_key(dbapi_connection, record):
+    # SQLite compares names byte for byte; give its queries the same key.
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function(
+            "skill_name_key", 1, skill_name_key, deterministic=True
+        )
+
+
+def parse_skill_names(csv):
+    """Split a comma separated skill string into non-blank names, keeping
+    the first spelling of names with the same ``skill_name_key``."""
+    names = {}
+    for name in csv.split(","):
+        name = name.strip()
+        if name:
+            names.setdefault(skill_name_key(name), name)
+    return list(names.values())
+
+
+def find_skills(names):
+    """Return ``{skill_name_key(name): Skill}`` for the stored skills that
+    the unique index considers equal to any of ``names``."""
+    keys = {skill_name_key(name) for name in names}
+    if not keys:
+        return {}
+    if db.engine.dialect.name == "sqlite":
+        # A scan, but SQLite has no collation that folds accents.
+        query = Skill.query.filter(
+            db.func.skill_name_key(Skill.name).in_(keys)
+        )
+    else:
+        # The index lookup matches like the unique index on MySQL.
+        query = Skill.query.filter(Skill.name.in_(names))
+    found = {}
+    for skill in query:
+        key = skill_name_key(skill.name)
+        if key in keys:
+            found.setdefault(key, skill)
+    return found
+
+
+def create_skills_from_csv_string(csv):
+    """Return Skill objects for every name in ``csv``.
+
+    Existing skills are fetched with ``find_skills``, so an existing
+    "Python" is returned for "python", and missing ones are added to the
+    current transaction without committing it. If another request inserts
+    the same name first, the unique index on ``skill.name`` rejects the
+    savepoint and the names are looked up again.
+    """
+    names = parse_skill_names(csv)
+    skills = {}
+
+    for _ in range(3):
+        skills.update(
+            find_skills(
+                [name for name in names if skill_name_key(name) not in skills]
+            )
+        )
+
+        missing = [
+            name for name in names if skill_name_key(name) not in skills
+        ]
+        if not missing:
+            break
+
+        new_skills = [Skill(name=name) for name in missing]
+        if db.engine.dialect.name == "sqlite":
+            # pysqlite's RELEASE SAVEPOINT would commit the outer
+            # transaction, and SQLite serialises writers anyway.
+            db.session.add_all(new_skills)
+            db.session.flush()
+        else:
+            try:
+                with db.session.begin_nested():
+                    db.session.add_all(new_skills)
+            except IntegrityError:
+                continue
+        skills.update(
+            (skill_name_key(skill.name), skill) for skill in new_skills
+        )
 
-    return skill_objects
+    return [skills[skill_name_key(name)] for name in names]
@@ -0,0 +1,583 @@
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import (
+    ActivityRollup,
+    Project,
+    Session,
+    SkillStats,
+    User,
+    bridge_session_skill,
+)
+
+PERIODS = ("day", "week", "month")
+DIMENSIONS = ("user", "project", "skill")
+
+# Models carrying session_count, total_minutes and last_activity, and the
+# session column that points at them.
+COUNTERS = ((User, Session.user_id), (Project, Session.project_id))
+
+SessionSnapshot = namedtuple(
+    "SessionSnapshot",
+    ["duration", "created", "skill_ids", "user_id", "project_id"],
+)
+
+
+def session_snapshot(se):
+    """Capture the fields of a session that feed the rollup tables."""
+    return SessionSnapshot(
+        se.duration,
+        se.created,
+        [skill.id for skill in se.skills],
+        se.user_id,
+        se.project_id,
+    )
+
+
+def _expire(model):
+    # Bulk UPDATE/INSERT statements bypass the identity map, so loaded rows
+    # have to be refreshed on next access.
+    for obj in list(db.session.identity_map.values()):
+        if isinstance(obj, model):
+            db.session.expire(obj)
+
+
+def _skill_aggregates():
+    return (
+        db.session.query(
+            bridge_session_skill.c.skill_id,
+            db.func.sum(Session.duration),
+            db.func.count(Session.id),
+            db.func.min(Session.created),
+            db.func.max(Session.created),
+        )
+        .join(Session, Session.id == bridge_session_skill.c.session_id)
+        .group_by(bridge_session_skill.c.skill_id)
+    )
+
+
+def rebuild_skill_stats(skill_ids=None):
+    """Recompute skill_stats from session rows, for some or all skills."""
+    stale = SkillStats.query
+    rows = _skill_aggregates()
+    if skill_ids is not None:
+        stale = stale.filter(SkillStats.skill_id.in_(skill_ids))
+        rows = rows.filter(bridge_session_skill.c.skill_id.in_(skill_ids))
+    stale.delete(synchronize_session=False)
+
+    insert = SkillStats.__table__.insert().from_select(
+        [
+            "skill_id",
+            "total_minutes",
+            "session_count",
+            "first_seen",
+            "last_seen",
+        ],
+        rows.statement,
+    )
+    db.session.execute(insert)
+    _expire(SkillStats)
+
+
+def _add_to_skill_stats(snapshot):
+    if not snapshot.skill_ids:
+        return
+
+    existing = {
+        skill_id
+        for (skill_id,) in db.session.query(SkillStats.skill_id).filter(
+            SkillStats.skill_id.in_(snapshot.skill_ids)
+        )
+    }
+    for skill_id in snapshot.skill_ids:
+        if skill_id not in existing:
+            db.session.add(
+                SkillStats(skill_id=skill_id, total_minutes=0, session_count=0)
+            )
+    db.session.flush()
+
+    created = snapshot.created
+    SkillStats.query.filter(
+        SkillStats.skill_id.in_(snapshot.skill_ids)
+    ).update(
+        {
+            SkillStats.total_minutes: SkillStats.total_minutes
+            + snapshot.duration,
+            SkillStats.session_count: SkillStats.session_count + 1,
+            SkillStats.first_seen: db.case(
+                (
+                    db.or_(
+                        SkillStats.first_seen.is_(None),
+                        SkillStats.first_seen > created,
+                    ),
+                    created,
+                ),
+                else_=SkillStats.first_seen,
+            ),
+            SkillStats.last_seen: db.case(
+                (
+                    db.or_(
+                        SkillStats.last_seen.is_(None),
+                        SkillStats.last_seen < created,
+                    ),
+                    created,
+                ),
+                else_=SkillStats.last_seen,
+            ),
+        },
+        synchronize_session=False,
+    )
+
+
+def _remove_from_skill_stats(snapshot):
+    if not snapshot.skill_ids:
+        return []
+
+    SkillStats.query.filter(
+        SkillStats.skill_id.in_(snapshot.skill_ids)
+    ).update(
+        {
+            SkillStats.total_minutes: SkillStats.total_minutes
+            - snapshot.duration,
+            SkillStats.session_count: SkillStats.session_count - 1,
+        },
+        synchronize_session=False,
+    )
+
+    # Counters can be decremented in place, but a first/last seen bound
+    # held by the removed session has to be looked up again.
+    return [
+        skill_id
+        for (skill_id,) in db.session.query(SkillStats.skill_id).filter(
+            SkillStats.skill_id.in_(snapshot.skill_ids),
+            db.or_(
+                SkillStats.first_seen == snapshot.created,
+                SkillStats.last_seen == snapshot.created,
+            ),
+        )
+    ]
+
+
+def _latest(column, model):
+    return (
+        db.session.query(db.func.max(Session.created))
+        .filter(column == model.id)
+        .scalar_subquery()
+    )
+
+
+def _shift_counters(snapshot, sign):
+    for model, column in COUNTERS:
+        key_id = getattr(snapshot, column.key)
+        values = {
+            model.session_count: model.session_count + sign,
+            model.total_minutes: model.total_minutes
+            + sign * snapshot.duration,
+        }
+        if sign > 0:
+            values[model.last_activity] = db.case(
+                (
+                    db.or_(
+                        model.last_activity.is_(None),
+                        model.last_activity < snapshot.created,
+                    ),
+                    snapshot.created,
+                ),
+                else_=model.last_activity,
+            )
+        else:
+            # The removed session may have been the latest one; the
+            # (user_id/project_id, id) indexes limit the lookup to the
+            # owner's sessions.
+            values[model.last_activity] = _latest(column, model)
+        model.query.filter(model.id == key_id).update(
+            values, synchronize_session=False
+        )
+
+
+def _add_counters(snapshots):
+    """Apply the counter deltas of many new sessions with one executemany
+    UPDATE per model."""
+    for model, column in COUNTERS:
+        totals = {}
+        for snapshot in snapshots:
+            key_id = getattr(snapshot, column.key)
+            count, minutes, latest = totals.get(key_id, (0, 0, None))
+            totals[key_id] = (
+                count + 1,
+                minutes + snapshot.duration,
+                max(latest or snapshot.created, snapshot.created),
+            )
+        if not totals:
+            continue
+
+        table = model.__table__
+        latest = db.bindparam("b_latest")
+        statement = (
+            table.update()
+            .where(table.c.id == db.bindparam("b_id"))
+            .values(
+                session_count=table.c.session_count + db.bindparam("b_count"),
+                total_minutes=table.c.total_minutes
+                + db.bindparam("b_minutes"),
+                last_activity=db.case(
+                    (
+                        db.or_(
+                            table.c.last_activity.is_(None),
+                            table.c.last_activity < latest,
+                        ),
+                        latest,
+                    ),
+                    else_=table.c.last_activity,
+                ),
+            )
+        )
+        db.session.execute(
+            statement,
+            [
+                {
+                    "b_id": key_id,
+                    "b_count": count,
+                    "b_minutes": minutes,
+                    "b_latest": latest,
+                }
+                for key_id, (count, minutes, latest) in totals.items()
+            ],
+        )
+
+
+def rebuild_counters():
+    """Recompute the User and Project session counters from session rows."""
+    for model, column in COUNTERS:
+        count = (
+            db.session.query(db.func.count(Session.id))
+            .filter(column == model.id)
+            .scalar_subquery()
+        )
+        minutes = (
+            db.session.query(
+                db.func.coalesce(db.func.sum(Session.duration), 0)
+            )
+            .filter(column == model.id)
+            .scalar_subquery()
+        )
+        model.query.update(
+            {
+                model.session_count: count,
+                model.total_minutes: minutes,
+                model.last_activity: _latest(column, model),
+            },
+            synchronize_session=False,
+        )
+        _expire(model)
+
+
+def counter_mismatches():
+    """Return ``(model name, id, stored, actual)`` for every User or Project
+    whose counters disagree with its sessions. Counters are compared as
+    ``(session_count, total_minutes, last_activity)`` tuples."""
+    mismatches = []
+    for model, column in COUNTERS:
+        actual = {
+            key_id: (count, int(minutes), latest)
+            for key_id, count, minutes, latest in db.session.query(
+                column,
+                db.func.count(Session.id),
+                db.func.sum(Session.duration),
+                db.func.max(Session.created),
+            ).group_by(column)
+        }
+        rows = db.session.query(
+            model.id,
+            model.session_count,
+            model.total_minutes,
+            model.last_activity,
+        )
+        for key_id, count, minutes, latest in rows:
+            stored = (count, minutes, latest)
+            expected = actual.get(key_id, (0, 0, None))
+            if stored != expected:
+                mismatches.append((model.__name__, key_id, stored, expected))
+    return mismatches
+
+
+def bucket_start(moment, period):
+    """Return the first day of the day, ISO week or month holding moment."""
+    day = moment.date() if isinstance(moment, datetime) else moment
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(bucket, period):
+    if period == "week":
+        return bucket + timedelta(days=7)
+    if period == "month":
+        if bucket.month == 12:
+            return bucket.replace(year=bucket.year + 1, month=1)
+        return bucket.replace(month=bucket.month + 1)
+    return bucket + timedelta(days=1)
+
+
+def _activity_groups(snapshot):
+    """Group the rollup keys touched by a session by (dimension, period,
+    bucket), so each group can be updated with one ``key_id IN`` statement.
+    """
+    keys = [("user", [snapshot.user_id]), ("project", [snapshot.project_id])]
+    if snapshot.skill_ids:
+        keys.append(("skill", snapshot.skill_ids))
+    return [
+        (dimension, period, bucket_start(snapshot.created, period), ids)
+        for dimension, ids in keys
+        for period in PERIODS
+    ]
+
+
+def _group_filter(groups):
+    return db.or_(
+        *[
+            db.and_(
+                ActivityRollup.dimension == dimension,
+                ActivityRollup.period == period,
+                ActivityRollup.bucket == bucket,
+                ActivityRollup.key_id.in_(ids),
+            )
+            for dimension, period, bucket, ids in groups
+        ]
+    )
+
+
+def _shift_activity(snapshot, sign):
+    groups = _activity_groups(snapshot)
+
+    if sign > 0:
+        existing = set(
+            db.session.query(
+                ActivityRollup.dimension,
+                ActivityRollup.key_id,
+                ActivityRollup.period,
+                ActivityRollup.bucket,
+            ).filter(_group_filter(groups))
+        )
+        missing = [
+            {
+                "dimension": dimension,
+                "key_id": key_id,
+                "period": period,
+                "bucket": bucket,
+                "total_minutes": 0,
+                "session_count": 0,
+            }
+            for dimension, period, bucket, ids in groups
+            for key_id in ids
+            if (dimension, key_id, period, bucket) not in existing
+        ]
+        if missing:
+            db.session.execute(ActivityRollup.__table__.insert(), missing)
+
+    for group in groups:
+        ActivityRollup.query.filter(_group_filter([group])).update(
+            {
+                ActivityRollup.total_minutes: ActivityRollup.total_minutes
+                + sign * snapshot.duration,
+                ActivityRollup.session_count: ActivityRollup.session_count
+                + sign,
+            },
+            synchronize_session=False,
+        )
+
+    if sign < 0:
+        ActivityRollup.query.filter(
+            _group_filter(groups), ActivityRollup.session_count <= 0
+        ).delete(synchronize_session=False)
+
+
+def rebuild_activity_rollups():
+    """Recompute every activity bucket from the session table."""
+    totals = defaultdict(lambda: [0, 0])
+
+    def add(dimension, key_id, created, duration):
+        for period in PERIODS:
+            row = totals[
+                (dimension, key_id, period, bucket_start(created, period))
+            ]
+            row[0] += duration
+            row[1] += 1
+
+    sessions = db.session.query(
+        Session.user_id, Session.project_id, Session.created, Session.duration
+    ).yield_per(1000)
+    for user_id, project_id, created, duration in sessions:
+        add("user", user_id, created, duration)
+        add("project", project_id, created, duration)
+
+    skills = (
+        db.session.query(
+            bridge_session_skill.c.skill_id, Session.created, Session.duration
+        )
+        .join(Session, Session.id == bridge_session_skill.c.session_id)
+        .yield_per(1000)
+    )
+    for skill_id, created, duration in skills:
+        add("skill", skill_id, created, duration)
+
+    ActivityRollup.query.delete(synchronize_session=False)
+    rows = [
+        {
+            "dimension": dimension,
+            "key_id": key_id,
+            "period": period,
+            "bucket": bucket,
+            "total_minutes": minutes,
+            "session_count": count,
+        }
+        for (dimension, key_id, period, bucket), (
+            minutes,
+            count,
+        ) in totals.items()
+    ]
+    if rows:
+        db.session.execute(ActivityRollup.__table__.insert(), rows)
+    _expire(ActivityRollup)
+
+
+def delete_activity_rollups(dimension, key_id):
+    """Remove the buckets of a deleted user, project or skill, inside the
+    caller's transaction, so a later row reusing its id starts empty."""
+    ActivityRollup.query.filter_by(dimension=dimension, key_id=key_id).delete(
+        synchronize_session=False
+    )
+    _expire(ActivityRollup)
+
+
+def activity_series(dimension, key_id, period, start, end):
+    """Return one ``{"bucket", "minutes", "sessions"}`` point per bucket
+    between ``start`` and ``end``, including empty buckets."""
+    first = bucket_start(start, period)
+    rows = ActivityRollup.query.filter_by(
+        dimension=dimension, key_id=key_id, period=period
+    ).filter(ActivityRollup.bucket >= first, ActivityRollup.bucket <= end)
+    found = {row.bucket: row for row in rows}
+
+    series = []
+    bucket = first
+    while bucket <= end:
+        row = found.get(bucket)
+        series.append(
+            {
+                "bucket": bucket.isoformat(),
+                "minutes": row.total_minutes if row else 0,
+                "sessions": row.session_count if row else 0,
+            }
+        )
+        bucket = _next_bucket(bucket, period)
+    return series
+
+
+def update_session_rollups(old=None, new=None):
+    """Move a session's contribution in the rollup tables from ``old`` to
+    ``new`` snapshots, inside the caller's transaction.
+
+    Pass only ``new`` for a created session and only ``old`` for a deleted
+    one.
+    """
+    db.session.flush()
+
+    stale_skills = []
+    if old is not None:
+        stale_skills = _remove_from_skill_stats(old)
+        _shift_activity(old, -1)
+        _shift_counters(old, -1)
+    if new is not None:
+        _add_to_skill_stats(new)
+        _shift_activity(new, 1)
+        _shift_counters(new, 1)
+    if stale_skills:
+        rebuild_skill_stats(stale_skills)
+    for model in (SkillStats, ActivityRollup, User, Project):
+        _expire(model)
+
+
+def add_session_rollups(snapshots):
+    """Add the contribution of many new sessions to the rollup tables,
+    inside the caller's transaction, with a fixed number of statements."""
+    db.session.flush()
+    _add_counters(snapshots)
+    _expire(User)
+    _expire(Project)
+
+    skill_ids = sorted(
+        {i for snapshot in snapshots for i in snapshot.skill_ids}
+    )
+    if skill_ids:
+        rebuild_skill_stats(skill_ids)
+
+    totals = defaultdict(lambda: [0, 0])
+    for snapshot in snapshots:
+        for dimension, period, bucket, ids in _activity_groups(snapshot):
+            for key_id in ids:
+                row = totals[(dimension, key_id, period, bucket)]
+                row[0] += snapshot.duration
+                row[1] += 1
+    if not totals:
+        return
+
+    existing = set(
+        db.session.query(
+            ActivityRollup.dimension,
+            ActivityRollup.key_id,
+            ActivityRollup.period,
+            ActivityRollup.bucket,
+        ).filter(
+            ActivityRollup.key_id.in_({key[1] for key in totals}),
+            ActivityRollup.bucket.in_({key[3] for key in totals}),
+        )
+    )
+    inserts = []
+    updates = []
+    for (dimension, key_id, period, bucket), (
+        minutes,
+        count,
+    ) in totals.items():
+        row = {
+            "dimension": dimension,
+            "key_id": key_id,
+            "period": period,
+            "bucket": bucket,
+            "total_minutes": minutes,
+            "session_count": count,
+        }
+        if (dimension, key_id, period, bucket) in existing:
+            updates.append({"b_" + name: value for name, value in row.items()})
+        else:
+            inserts.append(row)
+
+    table = ActivityRollup.__table__
+    if inserts:
+        db.session.execute(table.insert(), inserts)
+    if updates:
+        statement = (
+            table.update()
+            .where(table.c.dimension == db.bindparam("b_dimension"))
+            .where(table.c.key_id == db.bindparam("b_key_id"))
+            .where(table.c.period == db.bindparam("b_period"))
+            .where(table.c.bucket == db.bindparam("b_bucket"))
+            .values(
+                total_minutes=table.c.total_minutes
+                + db.bindparam("b_total_minutes"),
+                session_count=table.c.session_count
+                + db.bindparam("b_session_count"),
+            )
+        )
+        db.session.execute(statement, updates)
+    _expire(SkillStats)
+    _expire(ActivityRollup)
+
+
+def rebuild_rollups():
+    rebuild_skill_stats()
+    rebuild_activity_rollups()
+    rebuild_counters()
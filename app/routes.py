@@ -1,50 +1,94 @@
-from flask import flash, redirect, render_template, request, url_for, send_file
+from flask import (
+    Blueprint,
+    abort,
+    current_app,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    send_file,
+    stream_with_context,
+    url_for,
+)
 from flask_login import current_user, login_required, login_user, logout_user
 from werkzeug.urls import url_parse
 
-from app import app, db
+from app import db, response_cache
+from app.backup import iter_backup_zip
+from app.bulk import CSV_FIELDS, BulkError, bulk_create_sessions, read_csv_rows
+from app.database import use_primary
 from app.forms import (
+    LEVELS,
+    BulkSessionForm,
     LoginForm,
     SessionForm,
     SkillForm,
     ProjectForm,
     ImportBackupForm,
 )
+from app.jobs import cleanup_jobs, job_status, submit_job
+from app.listings import (
+    PAGE_ARGS,
+    SESSION_FILTER_ARGS,
+    Page,
+    date_arg,
+    filter_sessions,
+    keyset_page,
+    page_url_for,
+    with_session_relations,
+)
+from app.search import search as search_documents
+from app.rollups import (
+    DIMENSIONS,
+    PERIODS,
+    activity_series,
+    delete_activity_rollups,
+    session_snapshot,
+    update_session_rollups,
+)
 from app.models import (
+    Job,
     Session,
     Skill,
     User,
     create_skills_from_csv_string,
+    find_skills,
+    skill_name_key,
     Project,
 )
 import pytz
 
 import csv
-import os
-from zipfile import ZipFile
-from datetime import datetime, timezone
+from datetime import datetime, timedelta
+
+bp = Blueprint("main", __name__)
+
+
+def _latest(query, model, n):
+    return query.order_by(model.id.desc()).limit(n).all()
 
 
-@app.route("/")
-@app.route("/index")
+@bp.route("/")
+@bp.route("/index")
+@response_cache.cached(per_user=True)
 def index():
-    users = reversed(User.query.all()[-3:])
-    projects = reversed(Project.query.all()[-3:])
-    sessions = reversed(Session.query.all()[-3:])
-    skills = reversed(Skill.query.all()[-3:])
+    n = current_app.config["INDEX_LATEST"]
     return render_template(
         "index.html",
-        users=users,
-        projects=projects,
-        sessions=sessions,
-        skills=skills,
+        users=_latest(User.query, User, n),
+        projects=_latest(Project.query, Project, n),
+        sessions=_latest(with_session_relations(Session.query), Session, n),
+        skills=_latest(
+            Skill.query.options(db.joinedload(Skill.stats)), Skill, n
+        ),
     )
 
 
-@app.route("/login", methods=["GET", "POST"])
+@bp.route("/login", methods=["GET", "POST"])
 def login():
     if current_user.is_authenticated:
-        return redirect(url_for("index"))
+        return redirect(url_for(".index"))
 
     form = LoginForm()
 
@@ -52,23 +96,23 @@ def login():
         user = User.query.filter_by(username=form.username.data).first()
         if user is None or not user.check_password(form.password.data):
             flash("Invalid username or password")
-            return redirect(url_for("login"))
+            return redirect(url_for(".login"))
 
         login_user(user, remember=form.remember_me.data)
 
         next_page = request.args.get("next")
         if not next_page or url_parse(next_page).netloc != "":
-            next_page = url_for("index")
+            next_page = url_for(".index")
 
         return redirect(next_page)
 
     return render_template("login.html", title="Login", form=form)
 
 
-@app.route("/logout")
+@bp.route("/logout")
 def logout():
     logout_user()
-    return redirect(url_for("index"))
+    return redirect(url_for(".index"))
 
 
 def _localize_tz(pytz_local, datetime_obj):
@@ -78,7 +122,7 @@ def _localize_tz(pytz_local, datetime_obj):
     return localized
 
 
-@app.route("/project", methods=["GET", "POST"])
+@bp.route("/project", methods=["GET", "POST"])
 @login_required
 def project():
     form = ProjectForm()
@@ -90,30 +134,36 @@ def project():
 
         db.session.add(new_project)
         db.session.commit()
-        return redirect(url_for("project"))
+        response_cache.clear()
+        return redirect(url_for(".project"))
 
     return render_template("project_form.html", title="Project", form=form)
 
 
-@app.route("/project/all")
+@bp.route("/project/all")
+@response_cache.cached(query_args=PAGE_ARGS)
 def project_all():
-    projects = reversed(Project.query.all())
+    page = keyset_page(Project.query, Project)
     return render_template(
         "project_all.html",
         title="All Project",
         short_project=True,
-        projects=projects,
+        projects=page.items,
+        page=page,
     )
 
 
-@app.route("/project/<id>")
+@bp.route("/project/<id>")
+@response_cache.cached
 def project_one(id):
     projects = [Project.query.get(id)]
 
     if not projects[0]:
         raise ("Invalid session id")
 
-    sessions = projects[0].sessions
+    sessions = with_session_relations(projects[0].sessions).order_by(
+        Session.id.desc()
+    )
 
     return render_template(
         "project_all.html",
@@ -123,7 +173,20 @@ def project_one(id):
     )
 
 
-@app.route("/project/<id>/update", methods=["GET", "POST"])
+@bp.route("/project/<int:id>/chart.json")
+def project_chart(id):
+    pro = Project.query.get_or_404(id)
+
+    response = current_app.response_class(
+        pro.get_chart_series_json(), mimetype="application/json"
+    )
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config["CHART_MAX_AGE"]
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@bp.route("/project/<id>/update", methods=["GET", "POST"])
 @login_required
 def project_update(id):
     form = ProjectForm()
@@ -136,24 +199,28 @@ def project_update(id):
     if form.validate_on_submit():
         pro.name = form.name.data
         db.session.commit()
-        return redirect(url_for("project_one", id=pro.id))
+        response_cache.clear()
+        return redirect(url_for(".project_one", id=pro.id))
 
     form.name.data = pro.name
     return render_template("project_form.html", title="Project", form=form)
 
 
-@app.route("/project/<id>/delete")
+@bp.route("/project/<id>/delete")
 @login_required
+@use_primary
 def project_delete(id):
     pro = Project.query.get(id)
 
     if pro:
+        delete_activity_rollups("project", pro.id)
         db.session.delete(pro)
         db.session.commit()
-    return redirect(url_for("project_all"))
+        response_cache.clear()
+    return redirect(url_for(".project_all"))
 
 
-@app.route("/session", methods=["GET", "POST"])
+@bp.route("/session", methods=["GET", "POST"])
 @login_required
 def session():
     form = SessionForm()
@@ -196,28 +263,118 @@ def session():
         project.sessions.append(new_session)
 
         db.session.add(new_session)
+        db.session.flush()
+        update_session_rollups(new=session_snapshot(new_session))
         db.session.commit()
-        return redirect(url_for("session"))
+        response_cache.clear()
+        return redirect(url_for(".session"))
 
     form.timezone.data = "US/Pacific"
     form.project.old_project.data = 1
     return render_template("session_form.html", title="Session", form=form)
 
 
-@app.route("/session/all")
+def _create_sessions(rows):
+    """Insert ``rows`` as sessions of the current user in one transaction,
+    returning the new sessions or raising BulkError."""
+    if len(rows) > current_app.config["BULK_MAX_ROWS"]:
+        raise BulkError(
+            [
+                {
+                    "row": None,
+                    "field": None,
+                    "message": "At most {} rows per request.".format(
+                        current_app.config["BULK_MAX_ROWS"]
+                    ),
+                }
+            ]
+        )
+    try:
+        sessions = bulk_create_sessions(rows, current_user)
+        db.session.commit()
+    except BulkError:
+        db.session.rollback()
+        raise
+    response_cache.clear()
+    return sessions
+
+
+@bp.route("/session/bulk", methods=["GET", "POST"])
+@login_required
+def session_bulk():
+    form = BulkSessionForm()
+    errors = []
+
+    if form.validate_on_submit():
+        try:
+            sessions = _create_sessions(read_csv_rows(form.file.data.stream))
+        except BulkError as e:
+            errors = e.errors
+        except (UnicodeDecodeError, csv.Error) as e:
+            errors = [{"row": None, "field": None, "message": str(e)}]
+        else:
+            flash(f"Created {len(sessions)} sessions")
+            return redirect(url_for(".session_all"))
+
+    return render_template(
+        "session_bulk_form.html",
+        title="Bulk Sessions",
+        form=form,
+        fields=CSV_FIELDS,
+        errors=errors,
+    )
+
+
+@bp.route("/session/bulk.json", methods=["POST"])
+@login_required
+def session_bulk_json():
+    rows = request.get_json(silent=True)
+    if not isinstance(rows, list):
+        return jsonify(error="Expected a JSON array of sessions."), 400
+
+    try:
+        sessions = _create_sessions(rows)
+    except BulkError as e:
+        return jsonify(errors=e.errors), 400
+
+    return jsonify(created=len(sessions), ids=[se.id for se in sessions]), 201
+
+
+def _session_page():
+    query = filter_sessions(with_session_relations(Session.query))
+    return keyset_page(query, Session)
+
+
+@bp.route("/session/all")
+@response_cache.cached(query_args=PAGE_ARGS + SESSION_FILTER_ARGS)
 def session_all():
-    sessions = reversed(Session.query.all())
+    page = _session_page()
     return render_template(
         "session_all.html",
         title="All Sessions",
         short_session=True,
-        sessions=sessions,
+        sessions=page.items,
+        page=page,
+        levels=LEVELS,
+    )
+
+
+@bp.route("/session/all.json")
+def session_all_json():
+    page = _session_page()
+    return jsonify(
+        {
+            "sessions": [se.to_dict() for se in page.items],
+            "older": page.older_url,
+            "newer": page.newer_url,
+        }
     )
 
 
-@app.route("/session/<id>")
+@bp.route("/session/<id>")
+@response_cache.cached
 def session_one(id):
-    sessions = [Session.query.get(id)]
+    sessions = [with_session_relations(Session.query).get(id)]
 
     if not sessions[0]:
         raise ("Invalid session id")
@@ -227,7 +384,7 @@ def session_one(id):
     )
 
 
-@app.route("/session/<id>/update", methods=["GET", "POST"])
+@bp.route("/session/<id>/update", methods=["GET", "POST"])
 @login_required
 def session_update(id):
     form = SessionForm()
@@ -243,6 +400,7 @@ def session_update(id):
 
     # Successful update, replace db values with form's
     if form.validate_on_submit():
+        old = session_snapshot(se)
         skills = create_skills_from_csv_string(form.skills.data)
         Project.query.get(se.project_id).sessions.remove(se)
         se.name = form.name.data
@@ -272,8 +430,11 @@ def session_update(id):
             project = Project.query.get(form.project.old_project.data)
         project.sessions.append(se)
 
+        db.session.flush()
+        update_session_rollups(old, session_snapshot(se))
         db.session.commit()
-        return redirect(url_for("session_one", id=se.id))
+        response_cache.clear()
+        return redirect(url_for(".session_one", id=se.id))
 
     form.name.data = se.name
     form.duration.data = se.duration
@@ -289,23 +450,35 @@ def session_update(id):
     return render_template("session_form.html", title="Session", form=form)
 
 
-@app.route("/session/<id>/delete")
+@bp.route("/session/<id>/delete")
 @login_required
+@use_primary
 def session_delete(id):
     se = Session.query.get(id)
 
     if se:
+        old = session_snapshot(se)
         db.session.delete(se)
+        update_session_rollups(old=old)
         db.session.commit()
-    return redirect(url_for("session_all"))
+        response_cache.clear()
+    return redirect(url_for(".session_all"))
+
+
+def _skill_name_taken(name, skill=None):
+    existing = find_skills([name]).get(skill_name_key(name))
+    if existing is not None and existing is not skill:
+        flash("A skill named {} already exists".format(name))
+        return True
+    return False
 
 
-@app.route("/skill", methods=["GET", "POST"])
+@bp.route("/skill", methods=["GET", "POST"])
 @login_required
 def skill():
     form = SkillForm()
 
-    if form.validate_on_submit():
+    if form.validate_on_submit() and not _skill_name_taken(form.name.data):
         new_skill = Skill(
             name=form.name.data,
             explanation=form.explanation.data,
@@ -313,25 +486,29 @@ def skill():
 
         db.session.add(new_skill)
         db.session.commit()
-        return redirect(url_for("skill"))
+        response_cache.clear()
+        return redirect(url_for(".skill"))
 
     return render_template("skill_form.html", title="Skill", form=form)
 
 
-@app.route("/skill/all")
+@bp.route("/skill/all")
+@response_cache.cached(query_args=PAGE_ARGS)
 def skill_all():
-    skills = reversed(Skill.query.all())
+    page = keyset_page(Skill.query.options(db.joinedload(Skill.stats)), Skill)
     return render_template(
         "skill_all.html",
         title="All Skills",
         short_skill=True,
-        skills=skills,
+        skills=page.items,
+        page=page,
     )
 
 
-@app.route("/skill/<id>")
+@bp.route("/skill/<id>")
+@response_cache.cached
 def skill_one(id):
-    skills = [Skill.query.get(id)]
+    skills = [Skill.query.options(db.joinedload(Skill.stats)).get(id)]
 
     if not skills[0]:
         raise ("Invalid session id")
@@ -341,7 +518,7 @@ def skill_one(id):
     )
 
 
-@app.route("/skill/<id>/update", methods=["GET", "POST"])
+@bp.route("/skill/<id>/update", methods=["GET", "POST"])
 @login_required
 def skill_update(id):
     form = SkillForm()
@@ -351,214 +528,188 @@ def skill_update(id):
         raise ("Invalid session id")
 
     # Successful update, replace db values with form's
-    if form.validate_on_submit():
+    if form.validate_on_submit() and not _skill_name_taken(form.name.data, sk):
         sk.name = form.name.data
         sk.explanation = form.explanation.data
         db.session.commit()
-        return redirect(url_for("skill_one", id=sk.id))
+        response_cache.clear()
+        return redirect(url_for(".skill_one", id=sk.id))
 
     form.name.data = sk.name
     form.explanation.data = sk.explanation
     return render_template("skill_form.html", title="Skill", form=form)
 
 
-@app.route("/skill/<id>/delete")
+@bp.route("/skill/<id>/delete")
 @login_required
+@use_primary
 def skill_delete(id):
     sk = Skill.query.get(id)
 
     if sk:
+        delete_activity_rollups("skill", sk.id)
         db.session.delete(sk)
         db.session.commit()
-    return redirect(url_for("skill_all"))
+        response_cache.clear()
+    return redirect(url_for(".skill_all"))
+
+
+_PERIOD_DAYS = {"day": 1, "week": 7, "month": 28}
+
+
+@bp.route("/activity/<dimension>/<int:id>.json")
+def activity(dimension, id):
+    period = request.args.get("period", "week")
+    if dimension not in DIMENSIONS or period not in PERIODS:
+        abort(404)
+
+    end = date_arg("end", datetime.utcnow().date())
+    start = date_arg("start", end - timedelta(days=365))
+    buckets = (end - start).days // _PERIOD_DAYS[period]
+    if start > end or buckets > current_app.config["ACTIVITY_MAX_BUCKETS"]:
+        abort(400)
+
+    return jsonify(
+        {
+            "dimension": dimension,
+            "id": id,
+            "period": period,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "series": activity_series(dimension, id, period, start, end),
+        }
+    )
+
+
+@bp.route("/analytics.json")
+@response_cache.cached(query_args=("period",))
+def analytics_summary():
+    # pandas is only imported by the first request that needs it.
+    from app import analytics
+
+    period = request.args.get("period", "week")
+    if period not in analytics.PERIODS:
+        abort(404)
+    return jsonify(analytics.summary(period))
+
+
+_SEARCH_ENDPOINTS = {
+    "session": ".session_one",
+    "skill": ".skill_one",
+    "project": ".project_one",
+}
 
 
-@app.route("/about")
+@bp.route("/search")
+def search():
+    q = request.args.get("q", "")
+    page = max(request.args.get("page", 1, type=int), 1)
+    limit = current_app.config["SEARCH_PAGE_SIZE"]
+
+    results = search_documents(q, limit=limit + 1, offset=(page - 1) * limit)
+    has_next = len(results) > limit
+    results = results[:limit]
+    for result in results:
+        result["url"] = url_for(
+            _SEARCH_ENDPOINTS[result["kind"]], id=result["id"]
+        )
+
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify({"q": q, "page": page, "results": results})
+
+    return render_template(
+        "search.html",
+        title="Search",
+        q=q,
+        results=results,
+        page=Page(
+            results,
+            page_url_for(page=page + 1) if has_next else None,
+            page_url_for(page=page - 1) if page > 1 else None,
+        ),
+    )
+
+
+@bp.route("/about")
 def about():
     return "All about this portfolio and its creator"
 
 
-@app.route("/changelog")
+@bp.route("/changelog")
 def changelog():
     return "Changelog goes here"
 
 
-@app.route("/admin")
+@bp.route("/admin")
 @login_required
+@use_primary
 def admin():
-    return render_template("admin.html")
+    cleanup_jobs()
+    jobs = Job.query.order_by(Job.id.desc()).limit(10).all()
+    return render_template(
+        "admin.html", jobs=jobs, response_cache=response_cache.stats()
+    )
 
 
-@app.route("/admin/download_data_backup")
+@bp.route("/admin/cache.json")
+@login_required
+def cache_stats():
+    return jsonify(response_cache.stats())
+
+
+@bp.route("/admin/download_data_backup")
 @login_required
 def download_data_backup():
-    us = User.query.all()
-    sk = Skill.query.all()
-    po = Project.query.all()
-    se = Session.query.all()
-
-    basedir = os.path.abspath(os.path.dirname(__file__) + "/static/backup/")
-    if not os.path.exists(basedir):
-        os.makedirs(basedir)
-
-    with open(basedir + r"/user.csv", "w", newline="") as user_file:
-        header = ["username", "email", "password_hash", "admin"]
-        writer = csv.writer(user_file)
-        writer.writerow(header)
-        for u in us:
-            writer.writerow([u.username, u.email, u.password_hash, u.admin])
-
-    with open(basedir + r"/skill.csv", "w", newline="") as skill_file:
-        header = ["name", "explanation"]
-        writer = csv.writer(skill_file)
-        writer.writerow(header)
-        for s in sk:
-            writer.writerow([s.name, s.explanation])
-
-    with open(basedir + r"/project.csv", "w", newline="") as project_file:
-        header = ["name"]
-        writer = csv.writer(project_file)
-        writer.writerow(header)
-        for p in po:
-            writer.writerow([p.name])
-
-    with open(basedir + r"/session.csv", "w", newline="") as session_file:
-        header = [
-            "name",
-            "duration",
-            "level",
-            "explanation",
-            "created",
-            "edited",
-            "starttime",
-            "endtime",
-            "private",
-            "user_id",
-            "project_id",
-            "skills,",
-        ]
-        writer = csv.writer(session_file)
-        writer.writerow(header)
-        for s in se:
-            writer.writerow(
-                [
-                    s.name,
-                    s.duration,
-                    s.level,
-                    s.explanation,
-                    s.created,
-                    s.edited,
-                    s.starttime,
-                    s.endtime,
-                    s.private,
-                    s.user_id,
-                    s.project_id,
-                    s.get_skill_list_string().replace(",", "|"),
-                ]
-            )
-
-    with ZipFile(basedir + r"/backup.zip", "w") as backup:
-        backup.write(basedir + r"/user.csv", arcname=r"/user.csv")
-        backup.write(basedir + r"/skill.csv", arcname=r"/skill.csv")
-        backup.write(basedir + r"/project.csv", arcname=r"/project.csv")
-        backup.write(basedir + r"/session.csv", arcname=r"/session.csv")
-
-    return send_file(basedir + r"/backup.zip", as_attachment=True)
-
-
-def _remove_dot_leftover(string_date):
-    if "." in string_date:
-        return string_date.split(".")[0]
-    return string_date
-
-
-@app.route("/admin/import_data_backup", methods=["GET", "POST"])
+    chunks = iter_backup_zip(current_app.config["BACKUP_YIELD_PER"])
+    return current_app.response_class(
+        stream_with_context(chunks),
+        mimetype="application/zip",
+        headers={"Content-Disposition": "attachment; filename=backup.zip"},
+    )
+
+
+@bp.route("/admin/import_data_backup", methods=["GET", "POST"])
+@login_required
 def import_data_backup():
     form = ImportBackupForm()
 
     if form.validate_on_submit():
-        file = request.files["file"]
-        archive = ZipFile(file, "r")
-
-        users = csv.reader(archive.read("user.csv").decode().splitlines())
-        next(users)
-        skills = csv.reader(archive.read("skill.csv").decode().splitlines())
-        next(skills)
-        projects = csv.reader(
-            archive.read("project.csv").decode().splitlines()
-        )
-        next(projects)
-        sessions = csv.reader(
-            archive.read("session.csv").decode().splitlines()
-        )
-        next(sessions)
-
-        if not User.query.filter_by(username="admin").first():
-            for u in users:
-                if u:
-                    new_u = User(
-                        username=u[0],
-                        email=[1],
-                        password_hash=u[2],
-                        admin=True if u[3] == "True" else False,
-                    )
-                    db.session.add(new_u)
-            db.session.commit()
-
-        for s in skills:
-            if s:
-                new_s = Skill(
-                    name=s[0],
-                    explanation=s[1],
-                )
-                db.session.add(new_s)
-        db.session.commit()
+        job = submit_job("import", current_user, upload=request.files["file"])
+        return redirect(url_for(".job_one", id=job.id))
 
-        for p in projects:
-            if p:
-                new_p = Project(
-                    name=p[0],
-                )
-                db.session.add(new_p)
-        db.session.commit()
+    return render_template("import_backup_form.html", form=form)
 
-        for se in sessions:
-            if se:
-                new_se = Session(
-                    name=se[0],
-                    duration=se[1],
-                    level=se[2],
-                    explanation=se[3],
-                    created=datetime.strptime(
-                        _remove_dot_leftover(se[4]), "%Y-%m-%d %H:%M:%S"
-                    ).replace(tzinfo=timezone.utc),
-                    edited=datetime.strptime(
-                        _remove_dot_leftover(se[5]), "%Y-%m-%d %H:%M:%S"
-                    ).replace(tzinfo=timezone.utc),
-                    starttime=datetime.strptime(
-                        _remove_dot_leftover(se[6]), "%Y-%m-%d %H:%M:%S"
-                    ).replace(tzinfo=timezone.utc),
-                    endtime=datetime.strptime(
-                        _remove_dot_leftover(se[7]), "%Y-%m-%d %H:%M:%S"
-                    ).replace(tzinfo=timezone.utc),
-                    private=True if se[8] == "True" else False,
-                )
-                user = User.query.get(se[9])
-                user.sessions.append(new_se)
-
-                project = Project.query.get(se[10])
-                project.sessions.append(new_se)
-
-                new_se.skills = []
-                skill_objects = create_skills_from_csv_string(
-                    se[11].replace("|", ",")
-                )
-                for skill in skill_objects:
-                    new_se.skills.append(skill)
-                db.session.add(new_se)
 
-        db.session.commit()
+@bp.route("/admin/jobs/export")
+@login_required
+@use_primary
+def job_export():
+    job = submit_job("export", current_user)
+    return redirect(url_for(".job_one", id=job.id))
 
-        return redirect(url_for("admin"))
 
-    return render_template("import_backup_form.html", form=form)
+@bp.route("/admin/jobs/<int:id>")
+@login_required
+@use_primary
+def job_one(id):
+    cleanup_jobs()
+    job = Job.query.get_or_404(id)
+
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify(job_status(job))
+
+    return render_template(
+        "job.html", title="Job {}".format(job.id), job=job_status(job)
+    )
+
+
+@bp.route("/admin/jobs/<int:id>/download")
+@login_required
+@use_primary
+def job_download(id):
+    job = Job.query.get_or_404(id)
+
+    if job.kind != "export" or job.status != "finished" or not job.path:
+        abort(404)
+
+    return send_file(job.path, as_attachment=True, download_name="backup.zip")
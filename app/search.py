@@ -0,0 +1,178 @@
+"""Full-text search over sessions, skills and projects.
+
+On SQLite the documents live in an FTS5 table, ``search_index``, whose rowid
+encodes the entity kind and id and which is kept current by mapper events.
+On MySQL the source tables carry FULLTEXT indexes that InnoDB maintains
+itself, so only the query differs.
+"""
+import re
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from app import db
+from app.models import Project, Session, Skill
+
+KINDS = {Session: ("session", 1), Skill: ("skill", 2), Project: ("project", 3)}
+_KIND_NAMES = {code: name for name, code in KINDS.values()}
+_ROWID_STRIDE = 4
+
+CREATE_FTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index "
+    "USING fts5(title, body)"
+)
+
+# Databases known to have the FTS table. The table is created inside the
+# caller's transaction, so a database only joins the set once that commits;
+# a rollback takes the table with it.
+_ready = set()
+_PENDING = "search_index_pending"
+
+
+def _ensure_fts(connection):
+    key = str(connection.engine.url)
+    if key not in _ready:
+        connection.execute(text(CREATE_FTS))
+        connection.info[_PENDING] = key
+
+
+def _committed(connection):
+    key = connection.info.pop(_PENDING, None)
+    if key is not None:
+        _ready.add(key)
+
+
+def _rolled_back(connection, *args):
+    connection.info.pop(_PENDING, None)
+
+
+event.listen(Engine, "commit", _committed)
+event.listen(Engine, "rollback", _rolled_back)
+event.listen(Engine, "rollback_savepoint", _rolled_back)
+
+
+def _document(target):
+    explanation = getattr(target, "explanation", None) or ""
+    return {
+        "rowid": target.id * _ROWID_STRIDE + KINDS[type(target)][1],
+        "title": target.name,
+        "body": explanation,
+    }
+
+
+def _after_write(mapper, connection, target):
+    if connection.dialect.name != "sqlite":
+        return
+    _ensure_fts(connection)
+    connection.execute(
+        text(
+            "INSERT OR REPLACE INTO search_index(rowid, title, body) "
+            "VALUES (:rowid, :title, :body)"
+        ),
+        _document(target),
+    )
+
+
+def _after_delete(mapper, connection, target):
+    if connection.dialect.name != "sqlite":
+        return
+    _ensure_fts(connection)
+    connection.execute(
+        text("DELETE FROM search_index WHERE rowid = :rowid"),
+        {"rowid": _document(target)["rowid"]},
+    )
+
+
+for model in KINDS:
+    event.listen(model, "after_insert", _after_write)
+    event.listen(model, "after_update", _after_write)
+    event.listen(model, "after_delete", _after_delete)
+
+
+def rebuild_search_index():
+    """Recreate the search documents from the source tables."""
+    connection = db.session.connection()
+    if connection.dialect.name == "mysql":
+        connection.execute(text("OPTIMIZE TABLE session, skill, project"))
+        return
+    if connection.dialect.name != "sqlite":
+        return
+
+    connection.execute(text("DROP TABLE IF EXISTS search_index"))
+    connection.execute(text(CREATE_FTS))
+    connection.info[_PENDING] = str(connection.engine.url)
+    for model, (_, code) in KINDS.items():
+        table = model.__tablename__
+        body = "coalesce(explanation, '')" if table != "project" else "''"
+        connection.execute(
+            text(
+                "INSERT INTO search_index(rowid, title, body) "
+                "SELECT id * {stride} + {code}, name, {body} "
+                "FROM {table}".format(
+                    stride=_ROWID_STRIDE, code=code, body=body, table=table
+                )
+            )
+        )
+
+
+def _terms(query):
+    return re.findall(r"\w+", query)
+
+
+def _search_sqlite(connection, terms, limit, offset):
+    # Quote every term so user input can't form FTS5 syntax, and match
+    # prefixes so partial words still find results.
+    match = " ".join('"{}"*'.format(term) for term in terms)
+    rows = connection.execute(
+        text(
+            "SELECT rowid, title, bm25(search_index, 10.0, 1.0) AS score "
+            "FROM search_index WHERE search_index MATCH :match "
+            "ORDER BY score LIMIT :limit OFFSET :offset"
+        ),
+        {"match": match, "limit": limit, "offset": offset},
+    )
+    return [
+        {
+            "kind": _KIND_NAMES[rowid % _ROWID_STRIDE],
+            "id": rowid // _ROWID_STRIDE,
+            "title": title,
+            "score": -score,
+        }
+        for rowid, title, score in rows
+    ]
+
+
+def _search_mysql(connection, terms, limit, offset):
+    rows = connection.execute(
+        text(
+            "SELECT 'session' AS kind, id, name AS title, "
+            "MATCH(name, explanation) AGAINST (:q) AS score FROM session "
+            "WHERE MATCH(name, explanation) AGAINST (:q) "
+            "UNION ALL "
+            "SELECT 'skill', id, name, "
+            "MATCH(name, explanation) AGAINST (:q) FROM skill "
+            "WHERE MATCH(name, explanation) AGAINST (:q) "
+            "UNION ALL "
+            "SELECT 'project', id, name, MATCH(name) AGAINST (:q) "
+            "FROM project WHERE MATCH(name) AGAINST (:q) "
+            "ORDER BY score DESC LIMIT :limit OFFSET :offset"
+        ),
+        {"q": " ".join(terms), "limit": limit, "offset": offset},
+    )
+    return [
+        {"kind": kind, "id": id, "title": title, "score": float(score)}
+        for kind, id, title, score in rows
+    ]
+
+
+def search(query, limit=20, offset=0):
+    """Return up to ``limit`` results for ``query``, best match first."""
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    connection = db.session.connection()
+    if connection.dialect.name == "mysql":
+        return _search_mysql(connection, terms, limit, offset)
+    _ensure_fts(connection)
+    return _search_sqlite(connection, terms, limit, offset)
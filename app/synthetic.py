@@ -0,0 +1,134 @@
+"""Synthetic data for benchmarks and load tests.
+
+``generate`` appends users, projects, skills and sessions to the database in
+executemany batches. Skill popularity follows a Zipf-like curve and each
+session draws one to six skills, most often two or three, so aggregates see
+the same skew real portfolios have. The same seed yields the same rows.
+"""
+import random
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.forms import LEVELS
+from app.models import Project, Session, Skill, User, bridge_session_skill
+from app.rollups import rebuild_rollups
+from app.search import rebuild_search_index
+
+SKILLS_PER_SESSION = [1, 2, 3, 4, 5, 6]
+SKILLS_PER_SESSION_WEIGHTS = [15, 35, 30, 12, 5, 3]
+SPAN_DAYS = 3 * 365
+
+
+def _next_id(model):
+    return (db.session.query(db.func.max(model.id)).scalar() or 0) + 1
+
+
+def _insert(model, rows):
+    if rows:
+        db.session.bulk_insert_mappings(model, rows)
+
+
+def generate(
+    sessions=10000,
+    users=5,
+    projects=50,
+    skills=200,
+    chunk_size=5000,
+    seed=0,
+    progress=None,
+):
+    """Add synthetic rows to the current transaction, then rebuild the
+    rollups and search index. Returns the number of sessions added."""
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+
+    # Hashing is deliberately slow; every synthetic user shares one hash.
+    password_hash = generate_password_hash("password")
+    first_user = _next_id(User)
+    _insert(
+        User,
+        [
+            {
+                "id": first_user + i,
+                "username": f"user{first_user + i}",
+                "email": f"user{first_user + i}@example.com",
+                "password_hash": password_hash,
+                "admin": False,
+            }
+            for i in range(users)
+        ],
+    )
+
+    first_project = _next_id(Project)
+    _insert(
+        Project,
+        [
+            {"id": first_project + i, "name": f"Project {first_project + i}"}
+            for i in range(projects)
+        ],
+    )
+
+    first_skill = _next_id(Skill)
+    _insert(
+        Skill,
+        [
+            {"id": first_skill + i, "name": f"Skill {first_skill + i}"}
+            for i in range(skills)
+        ],
+    )
+
+    user_ids = range(first_user, first_user + users)
+    project_ids = range(first_project, first_project + projects)
+    skill_ids = range(first_skill, first_skill + skills)
+    skill_weights = [1 / rank for rank in range(1, skills + 1)]
+
+    next_id = _next_id(Session)
+    done = 0
+    while done < sessions:
+        batch = []
+        bridges = []
+        for session_id in range(
+            next_id, next_id + min(chunk_size, sessions - done)
+        ):
+            created = now - timedelta(minutes=rng.randrange(SPAN_DAYS * 1440))
+            duration = rng.randint(10, 240)
+            start = datetime(1900, 1, 1, rng.randint(6, 18), rng.randrange(60))
+            batch.append(
+                {
+                    "id": session_id,
+                    "name": f"Session {session_id}",
+                    "duration": duration,
+                    "level": rng.choice(LEVELS),
+                    "explanation": None,
+                    "created": created,
+                    "edited": created,
+                    "starttime": start,
+                    "endtime": start + timedelta(minutes=duration),
+                    "private": rng.random() < 0.1,
+                    "user_id": rng.choice(user_ids),
+                    "project_id": rng.choice(project_ids),
+                }
+            )
+            fan_out = rng.choices(
+                SKILLS_PER_SESSION, SKILLS_PER_SESSION_WEIGHTS
+            )[0]
+            picked = set(
+                rng.choices(skill_ids, skill_weights, k=min(fan_out, skills))
+            )
+            bridges.extend(
+                {"session_id": session_id, "skill_id": skill_id}
+                for skill_id in picked
+            )
+
+        _insert(Session, batch)
+        db.session.execute(bridge_session_skill.insert(), bridges)
+        next_id += len(batch)
+        done += len(batch)
+        if progress is not None:
+            progress(done)
+
+    rebuild_rollups()
+    rebuild_search_index()
+    return done
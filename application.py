@@ -1,7 +1,7 @@
-from app import app, db
+from app import create_app, db
 from app.models import Session, Skill, User, Project
 
-application = app
+application = app = create_app()
 
 
 @app.shell_context_processor
@@ -0,0 +1,33 @@
+"""gunicorn settings: ``gunicorn -c gunicorn.conf.py application``.
+
+With GUNICORN_PRELOAD=1 the master imports the app once and forks workers
+from it, so they start faster and share its memory copy-on-write. Each
+worker then gets new connection pools right after the fork.
+"""
+import gc
+import os
+
+bind = os.environ.get("GUNICORN_BIND") or "127.0.0.1:8000"
+workers = int(os.environ.get("WEB_CONCURRENCY") or 2)
+preload_app = os.environ.get("GUNICORN_PRELOAD") == "1"
+
+if preload_app and os.environ.get("GUNICORN_PRELOAD_CHARTS") == "1":
+    # pandas and plotly are otherwise imported lazily by each worker.
+    import app.analytics  # noqa: F401
+    import app.charts  # noqa: F401
+
+
+def pre_fork(server, worker):
+    # Objects that survive this far are shared, read-only state; moving
+    # them out of the collector's reach keeps their pages from being copied.
+    if server.cfg.preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from app import db
+        from app.database import dispose_engines
+        from application import application
+
+        dispose_engines(db, application)
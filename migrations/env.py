@@ -32,6 +32,18 @@ target_metadata = current_app.extensions['migrate'].db.metadata
 # ... etc.
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    # The full-text search table and its FTS5 shadow tables are maintained
+    # by app.search rather than declared as models.
+    if type_ == 'table' and reflected and name.startswith('search_index'):
+        return False
+    # The MySQL FULLTEXT indexes serve the same searches and are created by
+    # their migration alone.
+    if type_ == 'index' and reflected and name.startswith('ft_'):
+        return False
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -78,6 +90,7 @@ def run_migrations_online():
             connection=connection,
             target_metadata=target_metadata,
             process_revision_directives=process_revision_directives,
+            include_object=include_object,
             **current_app.extensions['migrate'].configure_args
         )
 
@@ -0,0 +1,83 @@
+"""unique skill names
+
+Revision ID: 5c1d8e2f7a90
+Revises: abf922d71cfa
+Create Date: 2022-05-02 18:21:04.312511
+
+"""
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5c1d8e2f7a90"
+down_revision = "abf922d71cfa"
+branch_labels = None
+depends_on = None
+
+
+skill = sa.table("skill", sa.column("id"), sa.column("name"))
+bridge = sa.table(
+    "bridge_session_skill", sa.column("session_id"), sa.column("skill_id")
+)
+
+
+def _key(name):
+    # Names MySQL's default collation treats as equal (case, accents and
+    # trailing spaces) would still collide in the unique index; a copy of
+    # app.models.skill_name_key, frozen for this migration.
+    decomposed = unicodedata.normalize("NFKD", name.strip())
+    return "".join(
+        c for c in decomposed if not unicodedata.combining(c)
+    ).casefold()
+
+
+def _merge_duplicate_skills():
+    conn = op.get_bind()
+    keep = {}
+    rows = conn.execute(
+        sa.select([skill.c.id, skill.c.name]).order_by(skill.c.id)
+    )
+    for skill_id, name in rows.fetchall():
+        if _key(name) not in keep:
+            keep[_key(name)] = skill_id
+            continue
+
+        kept_id = keep[_key(name)]
+        kept_sessions = {
+            session_id
+            for (session_id,) in conn.execute(
+                sa.select([bridge.c.session_id]).where(
+                    bridge.c.skill_id == kept_id
+                )
+            )
+        }
+        for (session_id,) in conn.execute(
+            sa.select([bridge.c.session_id]).where(
+                bridge.c.skill_id == skill_id
+            )
+        ).fetchall():
+            match = sa.and_(
+                bridge.c.session_id == session_id,
+                bridge.c.skill_id == skill_id,
+            )
+            if session_id in kept_sessions:
+                conn.execute(bridge.delete().where(match))
+            else:
+                conn.execute(
+                    bridge.update().where(match).values(skill_id=kept_id)
+                )
+        conn.execute(skill.delete().where(skill.c.id == skill_id))
+
+
+def upgrade():
+    _merge_duplicate_skills()
+    op.drop_index("ix_skill_name", table_name="skill")
+    op.create_index(op.f("ix_skill_name"), "skill", ["name"], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f("ix_skill_name"), table_name="skill")
+    op.create_index("ix_skill_name", "skill", ["name"], unique=False)
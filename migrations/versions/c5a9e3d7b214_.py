@@ -0,0 +1,46 @@
+"""edit stamps with microseconds on mysql
+
+Revision ID: c5a9e3d7b214
+Revises: 80c1e2ffd01e
+Create Date: 2022-06-27 09:41:18.204577
+
+"""
+from alembic import op
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = "c5a9e3d7b214"
+down_revision = "80c1e2ffd01e"
+branch_labels = None
+depends_on = None
+
+
+TABLES = ("session", "skill", "project")
+
+
+def upgrade():
+    # SQLite keeps the microseconds of its text stamps already.
+    if op.get_bind().dialect.name != "mysql":
+        return
+    for name in TABLES:
+        op.alter_column(
+            name,
+            "edited",
+            existing_type=mysql.DATETIME(),
+            type_=mysql.DATETIME(fsp=6),
+            existing_nullable=False,
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "mysql":
+        return
+    for name in TABLES:
+        op.alter_column(
+            name,
+            "edited",
+            existing_type=mysql.DATETIME(fsp=6),
+            type_=mysql.DATETIME(),
+            existing_nullable=False,
+        )
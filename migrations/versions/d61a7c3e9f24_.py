@@ -0,0 +1,58 @@
+"""full-text search index
+
+Revision ID: d61a7c3e9f24
+Revises: b4d09e6f3c15
+Create Date: 2022-05-30 17:12:45.550291
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "d61a7c3e9f24"
+down_revision = "b4d09e6f3c15"
+branch_labels = None
+depends_on = None
+
+
+FULLTEXT_INDEXES = [
+    ("ft_session_name_explanation", "session", ["name", "explanation"]),
+    ("ft_skill_name_explanation", "skill", ["name", "explanation"]),
+    ("ft_project_name", "project", ["name"]),
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_index "
+            "USING fts5(title, body)"
+        )
+        # rowid = id * 4 + kind (1 session, 2 skill, 3 project)
+        op.execute(
+            "INSERT INTO search_index(rowid, title, body) "
+            "SELECT id * 4 + 1, name, coalesce(explanation, '') FROM session"
+        )
+        op.execute(
+            "INSERT INTO search_index(rowid, title, body) "
+            "SELECT id * 4 + 2, name, coalesce(explanation, '') FROM skill"
+        )
+        op.execute(
+            "INSERT INTO search_index(rowid, title, body) "
+            "SELECT id * 4 + 3, name, '' FROM project"
+        )
+    elif dialect == "mysql":
+        for name, table, columns in FULLTEXT_INDEXES:
+            op.create_index(name, table, columns, mysql_prefix="FULLTEXT")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        op.execute("DROP TABLE IF EXISTS search_index")
+    elif dialect == "mysql":
+        for name, table, _ in FULLTEXT_INDEXES:
+            op.drop_index(name, table_name=table)
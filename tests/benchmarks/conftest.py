@@ -0,0 +1,66 @@
+"""Benchmarks of the hot pages and jobs against a synthetic dataset.
+
+They only run with ``--benchmark-only``; see the README for saving and
+comparing baselines. BENCH_SESSIONS sets the dataset size (default 10000).
+"""
+import os
+
+import pytest
+
+from app import create_app, db
+from app.backup import iter_backup_zip
+from app.synthetic import generate
+
+BENCH_SESSIONS = int(os.environ.get("BENCH_SESSIONS") or 10000)
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("benchmark_only", default=False):
+        return
+    skip = pytest.mark.skip(reason="benchmarks only run with --benchmark-only")
+    here = os.path.dirname(__file__)
+    for item in items:
+        if str(item.fspath).startswith(here):
+            item.add_marker(skip)
+
+
+def _app(path):
+    return create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+            "RESPONSE_CACHE_SECONDS": 0,
+            "TESTING": True,
+        }
+    )
+
+
+@pytest.fixture(scope="session")
+def bench_app(tmp_path_factory):
+    app = _app(tmp_path_factory.mktemp("bench") / "bench.db")
+    with app.app_context():
+        db.create_all()
+        generate(sessions=BENCH_SESSIONS, users=5, projects=50, skills=200)
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.get_engine().dispose()
+
+
+@pytest.fixture(scope="session")
+def bench_client(bench_app):
+    return bench_app.test_client()
+
+
+@pytest.fixture(scope="session")
+def bench_backup(bench_app):
+    return b"".join(iter_backup_zip())
+
+
+@pytest.fixture()
+def empty_app(tmp_path):
+    """A second, empty database for timing imports of ``bench_backup``."""
+    app = _app(tmp_path / "import.db")
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.get_engine().dispose()
@@ -0,0 +1,46 @@
+import io
+
+import pytest
+
+from app import chart_cache, db
+from app.backup import import_backup, iter_backup_zip
+from app.models import Project
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.parametrize(
+    "url", ["/index", "/session/all", "/project/all", "/project/1"]
+)
+def test_page(benchmark, bench_client, url):
+    response = benchmark(bench_client.get, url)
+
+    assert response.status_code == 200
+
+
+def test_get_graphJSON(benchmark, bench_app):
+    project = db.session.get(Project, 1)
+
+    def build():
+        chart_cache.clear()
+        return project.get_graphJSON()
+
+    assert benchmark(build)
+
+
+def test_export(benchmark, bench_app):
+    size = benchmark(lambda: sum(len(chunk) for chunk in iter_backup_zip()))
+
+    assert size > 0
+
+
+def test_import(benchmark, bench_backup, empty_app):
+    def setup():
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        return (io.BytesIO(bench_backup),), {}
+
+    stats = benchmark.pedantic(import_backup, setup=setup, rounds=3)
+
+    assert stats["rows"] > 0
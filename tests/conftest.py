@@ -0,0 +1,116 @@
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from app import chart_cache, create_app, db
+from app.rollups import rebuild_rollups
+from app.models import Project, Session, Skill, User
+
+
+@pytest.fixture()
+def app(tmp_path):
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///"
+            + str(tmp_path / "test.db"),
+            "TESTING": True,
+            "RESPONSE_CACHE_SECONDS": 0,
+            "JOB_DIR": str(tmp_path / "jobs"),
+            "WTF_CSRF_ENABLED": False,
+        }
+    )
+
+    chart_cache.clear()
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        for bind in [None] + list(app.config.get("SQLALCHEMY_BINDS") or {}):
+            db.get_engine(bind=bind).dispose()
+
+
+@pytest.fixture()
+def replica(app, tmp_path):
+    """Point the replica bind at a second SQLite file with the same schema
+    and return its engine."""
+    app.config["SQLALCHEMY_BINDS"] = {
+        "replica": "sqlite:///" + str(tmp_path / "replica.db")
+    }
+    engine = db.get_engine(app, bind="replica")
+    db.Model.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture()
+def count_queries(app):
+    @contextmanager
+    def _count_queries(bind=None):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = db.get_engine(bind=bind)
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(
+                engine, "before_cursor_execute", before_cursor_execute
+            )
+
+    return _count_queries
+
+
+@pytest.fixture()
+def login(client):
+    def _login(username="admin", password="admin"):
+        response = client.post(
+            "/login", data={"username": username, "password": password}
+        )
+        assert response.status_code == 302
+        return client
+
+    return _login
+
+
+@pytest.fixture()
+def seed(app):
+    def _seed(sessions=10, skills_per_session=2, projects=1):
+        user = User(username="admin", email="admin@example.com", admin=True)
+        user.set_password("admin")
+        db.session.add(user)
+
+        project_objs = [Project(name=f"project {i}") for i in range(projects)]
+        skill_objs = [
+            Skill(name=f"skill {i}") for i in range(skills_per_session + 1)
+        ]
+        db.session.add_all(project_objs + skill_objs)
+
+        for i in range(sessions):
+            se = Session(
+                name=f"session {i}",
+                duration=30 + i,
+                level="basic",
+                starttime=datetime(2022, 1, 1, 9, 0),
+                endtime=datetime(2022, 1, 1, 10, 0),
+                author=user,
+                project=project_objs[i % projects],
+            )
+            for sk in skill_objs[i % 2:][:skills_per_session]:
+                se.skills.append(sk)
+            db.session.add(se)
+
+        rebuild_rollups()
+        db.session.commit()
+        return user
+
+    return _seed
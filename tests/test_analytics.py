@@ -0,0 +1,53 @@
+from app import analytics
+from app.analytics.benchmark import loop_skill_totals, synthetic_frames
+
+
+def test_summary_aggregates(seed):
+    seed(sessions=4, skills_per_session=2, projects=2)
+    result = analytics.summary("month")
+
+    assert result["sessions"] == 4
+    assert result["minutes"] == 30 + 31 + 32 + 33
+    assert result["skills"] == [
+        {"skill_id": 1, "name": "skill 0", "minutes": 62, "sessions": 2},
+        {"skill_id": 2, "name": "skill 1", "minutes": 126, "sessions": 4},
+        {"skill_id": 3, "name": "skill 2", "minutes": 64, "sessions": 2},
+    ]
+    assert [p["minutes"] for p in result["projects"]] == [62, 64]
+    assert result["levels"] == [
+        {"level": "basic", "minutes": 126, "sessions": 4}
+    ]
+    assert len(result["periods"]) == 1
+
+
+def test_vectorised_totals_match_loop():
+    frames = synthetic_frames(500)
+    minutes, counts = loop_skill_totals(*frames)
+    totals = analytics.skill_totals(*frames)
+
+    assert dict(zip(totals["name"], totals["minutes"])) == minutes
+    assert dict(zip(totals["name"], totals["sessions"])) == counts
+
+
+def test_analytics_endpoint(client, seed):
+    seed(sessions=2)
+
+    assert client.get("/analytics.json").get_json()["sessions"] == 2
+    assert client.get("/analytics.json?period=decade").status_code == 404
+
+
+def test_public_aggregates_are_cached(app, client, seed, count_queries):
+    app.config["RESPONSE_CACHE_SECONDS"] = 60
+    seed(sessions=2)
+    for url in ("/analytics.json?period=month", "/api/v1/aggregates"):
+        first = client.get(url)
+
+        with count_queries() as statements:
+            again = client.get(url)
+            revalidated = client.get(
+                url, headers={"If-None-Match": first.headers["ETag"]}
+            )
+
+        assert again.get_json() == first.get_json()
+        assert revalidated.status_code == 304
+        assert statements == []
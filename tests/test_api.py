@@ -0,0 +1,71 @@
+from app import db
+from app.models import Session
+
+
+def test_api_sessions_paginated(client, seed):
+    seed(sessions=5, skills_per_session=2)
+    data = client.get("/api/v1/sessions?limit=2").get_json()
+
+    assert [se["id"] for se in data["sessions"]] == [5, 4]
+    assert data["sessions"][0]["skills"] == ["skill 0", "skill 1"]
+    assert "/api/v1/sessions?" in data["older"]
+
+
+def test_api_entities(client, seed):
+    seed(sessions=4, skills_per_session=2)
+
+    assert client.get("/api/v1/sessions/1").get_json()["name"] == "session 0"
+    assert client.get("/api/v1/sessions/99").status_code == 404
+    assert client.get("/api/v1/projects/1").get_json()["skills"][0] == {
+        "name": "skill 0",
+        "minutes": 62,
+    }
+    assert client.get("/api/v1/skills/2").get_json()["session_count"] == 4
+    assert len(client.get("/api/v1/skills").get_json()["skills"]) == 3
+    assert client.get("/api/v1/aggregates").get_json()["sessions"] == 4
+
+
+def test_api_not_modified_until_data_changes(client, seed, count_queries):
+    seed(sessions=3)
+    first = client.get("/api/v1/sessions")
+    etag = first.headers["ETag"]
+    assert first.headers["Last-Modified"]
+
+    with count_queries() as statements:
+        cached = client.get(
+            "/api/v1/sessions", headers={"If-None-Match": etag}
+        )
+    assert cached.status_code == 304
+    assert len(statements) == 1
+
+    db.session.delete(Session.query.get(1))
+    db.session.commit()
+    changed = client.get("/api/v1/sessions", headers={"If-None-Match": etag})
+
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_api_etag_depends_on_query(client, seed):
+    seed(sessions=3)
+    etag = client.get("/api/v1/sessions?limit=1").headers["ETag"]
+
+    assert client.get("/api/v1/sessions").headers["ETag"] != etag
+
+
+def test_api_etag_changes_when_a_skill_or_project_is_renamed(
+    client, seed, login
+):
+    seed(sessions=2)
+    login()
+
+    for listing, update in (
+        ("/api/v1/skills", "/skill/1/update"),
+        ("/api/v1/projects", "/project/1/update"),
+    ):
+        etag = client.get(listing).headers["ETag"]
+        client.post(update, data={"name": "renamed"})
+        response = client.get(listing, headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert "renamed" in response.get_data(as_text=True)
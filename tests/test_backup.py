@@ -0,0 +1,81 @@
+import csv
+import io
+from zipfile import ZipFile
+
+import pytest
+
+from app import db
+from app.backup import SESSION_HEADER, import_backup
+from app.models import Project, Session, Skill, bridge_session_skill
+
+
+def _read_member(archive, name):
+    return list(csv.reader(io.TextIOWrapper(archive.open(name), "utf-8")))
+
+
+def test_download_backup_streams_zip(app, seed, login):
+    app.config["BACKUP_YIELD_PER"] = 3
+    seed(sessions=10, skills_per_session=2)
+    response = login().get("/admin/download_data_backup")
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == "application/zip"
+
+    archive = ZipFile(io.BytesIO(response.get_data()))
+    assert sorted(archive.namelist()) == [
+        "project.csv",
+        "session.csv",
+        "skill.csv",
+        "user.csv",
+    ]
+
+    sessions = _read_member(archive, "session.csv")
+    assert len(sessions) == 11
+    assert sessions[1][0] == "session 0"
+    assert sessions[1][-1] == "skill 0|skill 1"
+    assert _read_member(archive, "user.csv")[1][0] == "admin"
+
+
+def test_backup_round_trip(app, seed, login, tmp_path):
+    seed(sessions=10, skills_per_session=2, projects=2)
+    client = login()
+    backup = client.get("/admin/download_data_backup").get_data()
+
+    db.session.execute(bridge_session_skill.delete())
+    Session.query.delete()
+    db.session.commit()
+
+    stats = import_backup(io.BytesIO(backup), chunk_size=4)
+
+    # users are skipped because an admin already exists
+    assert stats["rows"] == 3 + 2 + 10
+    assert stats["rows_per_second"] > 0
+    assert Session.query.count() == 10
+    assert Skill.query.count() == 3
+    assert Project.query.count() == 4
+    restored = Session.query.filter_by(name="session 3").one()
+    assert restored.project.name == "project 1"
+    assert sorted(s.name for s in restored.skills) == ["skill 1", "skill 2"]
+
+
+def test_backup_import_is_all_or_nothing(app, seed):
+    seed(sessions=2)
+    buffer = io.BytesIO()
+    with ZipFile(buffer, "w") as archive:
+        archive.writestr("user.csv", "username,email,password_hash,admin\n")
+        archive.writestr("skill.csv", "name,explanation\nfresh,\n")
+        archive.writestr("project.csv", "name\n")
+        archive.writestr(
+            "session.csv",
+            ",".join(SESSION_HEADER)
+            + "\nbad,5,basic,,2022-01-01 00:00:00,2022-01-01 00:00:00,"
+            "2022-01-01 00:00:00,2022-01-01 00:00:00,False,42,1,fresh\n",
+        )
+    buffer.seek(0)
+
+    with pytest.raises(ValueError):
+        import_backup(buffer)
+
+    assert Skill.query.filter_by(name="fresh").first() is None
+    assert Session.query.count() == 2
@@ -0,0 +1,122 @@
+import io
+
+from app import db
+from app.models import ActivityRollup, Project, Session, Skill, SkillStats
+from app.rollups import rebuild_rollups
+from app.search import search
+
+
+def _row(**changes):
+    row = {
+        "name": "bulk session",
+        "duration": 45,
+        "level": "basic",
+        "project": "project 0",
+        "skills": "skill 0, python",
+        "starttime": "09:00",
+        "endtime": "09:45",
+        "created": "2022-03-01",
+    }
+    row.update(changes)
+    return row
+
+
+def test_json_rows_are_created_in_one_request(app, client, seed, login):
+    seed(sessions=1)
+    login()
+    rows = [_row(name=f"bulk {i}", project="new project") for i in range(3)]
+
+    response = client.post("/session/bulk.json", json=rows)
+
+    assert response.status_code == 201
+    assert response.get_json()["created"] == 3
+    assert Session.query.count() == 4
+    assert Project.query.filter_by(name="new project").count() == 1
+    assert Skill.query.filter_by(name="python").count() == 1
+    python = Skill.query.filter_by(name="python").one()
+    assert python.stats.session_count == 3
+    assert python.stats.total_minutes == 135
+    assert len(search("bulk")) == 3
+
+
+def test_rollups_match_a_full_rebuild(app, client, seed, login):
+    seed(sessions=3)
+    login()
+    client.post(
+        "/session/bulk.json",
+        json=[_row(), _row(created="2022-01-01", skills="skill 1")],
+    )
+
+    def snapshot():
+        return (
+            sorted(
+                (s.skill_id, s.total_minutes, s.session_count)
+                for s in SkillStats.query
+            ),
+            sorted(
+                (
+                    r.dimension,
+                    r.key_id,
+                    r.period,
+                    r.bucket,
+                    r.total_minutes,
+                    r.session_count,
+                )
+                for r in ActivityRollup.query
+            ),
+        )
+
+    incremental = snapshot()
+    rebuild_rollups()
+    db.session.commit()
+    assert snapshot() == incremental
+
+
+def test_invalid_rows_are_reported_and_nothing_is_written(
+    app, client, seed, login
+):
+    seed(sessions=1)
+    login()
+    rows = [
+        _row(),
+        _row(starttime="10:00", endtime="09:00"),
+        _row(level="expert", duration="soon"),
+    ]
+
+    response = client.post("/session/bulk.json", json=rows)
+    errors = response.get_json()["errors"]
+
+    assert response.status_code == 400
+    assert {(e["row"], e["field"]) for e in errors} == {
+        (2, "endtime"),
+        (3, "duration"),
+        (3, "level"),
+    }
+    assert "End Time must not be earlier" in errors[0]["message"]
+    assert Session.query.count() == 1
+    assert Skill.query.filter_by(name="python").count() == 0
+
+
+def test_csv_upload(app, client, seed, login):
+    seed(sessions=1)
+    login()
+    csv = (
+        "name,duration,level,project,skills,starttime,endtime\n"
+        'csv one,30,basic,project 0,"a, b",08:00,08:30\n'
+        "csv two,60,master,project 0,b,10:00,11:00\n"
+    )
+
+    response = client.post(
+        "/session/bulk",
+        data={"file": (io.BytesIO(csv.encode()), "sessions.csv")},
+    )
+
+    assert response.status_code == 302
+    assert Session.query.filter(Session.name.like("csv %")).count() == 2
+    assert Skill.query.filter_by(name="b").one().stats.session_count == 2
+
+
+def test_bulk_requires_login(app, client):
+    response = client.post("/session/bulk.json", json=[_row()])
+
+    assert response.status_code == 302
@@ -0,0 +1,22 @@
+from app.cache import LRUCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_bytes=3 * LRUCache.sizeof("x" * 10))
+    cache.set("a", "a" * 10)
+    cache.set("b", "b" * 10)
+    cache.set("c", "c" * 10)
+    cache.get("a")
+    cache.set("d", "d" * 10)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.size <= cache.max_bytes
+
+
+def test_lru_skips_values_larger_than_cap():
+    cache = LRUCache(max_bytes=10)
+    cache.set("big", "x" * 100)
+
+    assert cache.get("big") is None
+    assert cache.misses == 1
@@ -0,0 +1,36 @@
+def test_project_chart_json(client, seed):
+    seed(sessions=4, skills_per_session=2)
+    response = client.get("/project/1/chart.json")
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "project_id": 1,
+        "skills": ["skill 0", "skill 1", "skill 2"],
+        "minutes": [62, 126, 64],
+    }
+    assert response.headers["ETag"]
+    assert "max-age" in response.headers["Cache-Control"]
+
+
+def test_project_chart_json_not_modified(client, seed):
+    seed(sessions=2)
+    etag = client.get("/project/1/chart.json").headers["ETag"]
+    response = client.get(
+        "/project/1/chart.json", headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == 304
+
+
+def test_project_chart_json_unknown_project(client, seed):
+    seed(sessions=1)
+
+    assert client.get("/project/99/chart.json").status_code == 404
+
+
+def test_project_listing_does_not_inline_charts(client, seed):
+    seed(sessions=2)
+    body = client.get("/project/all").get_data(as_text=True)
+
+    assert "/project/1/chart.json" in body
+    assert "skill 0" not in body
@@ -0,0 +1,35 @@
+import importlib
+
+from app import config
+
+
+def test_rds_config_sets_pool_options(monkeypatch):
+    for name, value in {
+        "RDS_HOSTNAME": "primary",
+        "RDS_REPLICA_HOSTNAME": "replica",
+        "RDS_USERNAME": "user",
+        "RDS_PASSWORD": "secret",
+        "RDS_PORT": "3306",
+        "RDS_DB_NAME": "portfolio",
+        "DB_POOL_SIZE": "7",
+    }.items():
+        monkeypatch.setenv(name, value)
+    try:
+        Config = importlib.reload(config).Config
+    finally:
+        monkeypatch.undo()
+        importlib.reload(config)
+
+    options = Config.SQLALCHEMY_ENGINE_OPTIONS
+    assert options["pool_size"] == 7
+    assert options["pool_pre_ping"] is True
+    assert options["pool_recycle"] < 3600
+    assert "@replica:3306/portfolio" in Config.SQLALCHEMY_BINDS["replica"]
+
+
+def test_pool_status_is_logged(app, client, caplog):
+    app.config["DB_POOL_LOG_SECONDS"] = 0.001
+    with caplog.at_level("INFO", logger=app.logger.name):
+        client.get("/about")
+
+    assert "Connection pool primary" in caplog.text
@@ -0,0 +1,54 @@
+import os
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from app import create_app, db
+from app.database import dispose_engines
+from app.models import Skill
+
+
+def test_apps_are_isolated(tmp_path):
+    apps = [
+        create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path}/{n}.db"})
+        for n in ("a", "b")
+    ]
+    for app in apps:
+        with app.app_context():
+            db.create_all()
+
+    with apps[0].app_context():
+        db.session.add(Skill(name="only in a"))
+        db.session.commit()
+        db.session.remove()
+
+    with apps[1].app_context():
+        assert Skill.query.count() == 0
+        db.session.remove()
+
+    for app in apps:
+        with app.app_context():
+            db.get_engine().dispose()
+
+
+def test_dispose_engines_gives_new_pools(app):
+    engine = db.get_engine()
+    inherited = engine.pool
+
+    dispose_engines(db, app)
+
+    assert engine.pool is not inherited
+
+
+def test_connections_from_another_process_are_replaced(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/pid.db", poolclass=QueuePool)
+    with engine.connect() as connection:
+        parent = connection.connection.dbapi_connection
+
+    pid = os.getpid()
+    monkeypatch.setattr(os, "getpid", lambda: pid + 1)
+    with engine.connect() as connection:
+        child = connection.connection.dbapi_connection
+
+    assert child is not parent
+    engine.dispose()
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.models import Session
+
+
+def _ids(client, query):
+    data = client.get("/session/all.json?" + query).get_json()
+    return [se["id"] for se in data["sessions"]]
+
+
+def test_session_filters(client, seed):
+    seed(sessions=6, skills_per_session=2, projects=2)
+    se = Session.query.get(2)
+    se.level = "master"
+    se.created = datetime(2021, 3, 4, 12, 0)
+    db.session.commit()
+
+    assert _ids(client, "level=master") == [2]
+    assert _ids(client, "project=2") == [6, 4, 2]
+    assert _ids(client, "skill=1") == [5, 3, 1]
+    assert _ids(client, "user=1&min_duration=34") == [6, 5]
+    assert _ids(client, "start=2021-03-04&end=2021-03-04") == [2]
+    assert _ids(client, "project=1&skill=3") == []
+    assert _ids(client, "limit=2&before=4") == [3, 2]
+
+
+def test_session_filters_are_kept_in_page_links(client, seed):
+    seed(sessions=6, projects=2)
+    data = client.get("/session/all.json?project=1&limit=2").get_json()
+
+    assert "project=1" in data["older"]
+    assert client.get("/session/all?start=bad").status_code == 400
+
+
+@pytest.mark.parametrize(
+    "query, index",
+    [
+        ("user=1", "ix_session_user_id_id"),
+        ("project=1&before=5", "ix_session_project_id_id"),
+    ],
+)
+def test_filtered_listings_use_indexes(
+    client, seed, count_queries, query, index
+):
+    seed(sessions=6, projects=2)
+    with count_queries() as statements:
+        client.get("/session/all.json?" + query)
+    listing = next(
+        s
+        for s in statements
+        if s.startswith("SELECT") and "ORDER BY session.id DESC" in s
+    )
+
+    # SQLite plans do not depend on the bound values.
+    plan = str(
+        db.session.connection()
+        .exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + listing, (None,) * listing.count("?")
+        )
+        .fetchall()
+    )
+
+    assert index in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,8 @@
+def test_index_shows_latest_entities(app, client, seed):
+    app.config["INDEX_LATEST"] = 2
+    seed(sessions=5)
+    body = client.get("/index").get_data(as_text=True)
+
+    assert "session 4:" in body
+    assert "session 3:" in body
+    assert "session 2:" not in body
@@ -0,0 +1,164 @@
+import io
+import os
+import socket
+import subprocess
+from datetime import datetime, timedelta
+from zipfile import ZipFile
+
+from sqlalchemy import event
+
+from app import db
+from app.jobs import cleanup_jobs, wait_for_job
+from app.models import Job, Session
+
+
+def test_export_job_produces_downloadable_backup(seed, login):
+    seed(sessions=5)
+    client = login()
+
+    response = client.get("/admin/jobs/export")
+    job_id = int(response.headers["Location"].rsplit("/", 1)[1])
+    wait_for_job(job_id, timeout=10)
+
+    status = client.get(
+        "/admin/jobs/{}".format(job_id),
+        headers={"Accept": "application/json"},
+    ).get_json()
+    assert status["status"] == "finished"
+    assert status["progress"] == 1 + 3 + 1 + 5
+
+    download = client.get("/admin/jobs/{}/download".format(job_id))
+    archive = ZipFile(io.BytesIO(download.get_data()))
+    assert "session.csv" in archive.namelist()
+
+
+def test_import_job_runs_in_background(seed, login):
+    seed(sessions=3)
+    client = login()
+    backup = client.get("/admin/download_data_backup").get_data()
+
+    response = client.post(
+        "/admin/import_data_backup",
+        data={"file": (io.BytesIO(backup), "backup.zip")},
+        content_type="multipart/form-data",
+    )
+    job_id = int(response.headers["Location"].rsplit("/", 1)[1])
+    wait_for_job(job_id, timeout=10)
+
+    job = Job.query.get(job_id)
+    assert job.status == "finished"
+    assert job.path is None
+    assert Session.query.count() == 6
+
+
+def test_failed_job_is_recorded(seed, login):
+    seed(sessions=1)
+    client = login()
+
+    response = client.post(
+        "/admin/import_data_backup",
+        data={"file": (io.BytesIO(b"not a zip"), "backup.zip")},
+        content_type="multipart/form-data",
+    )
+    job_id = int(response.headers["Location"].rsplit("/", 1)[1])
+    wait_for_job(job_id, timeout=10)
+
+    assert Job.query.get(job_id).status == "failed"
+    body = client.get("/admin/jobs/{}".format(job_id)).get_data(as_text=True)
+    assert "failed" in body
+
+
+def test_export_progress_is_saved_while_running(app, seed, login):
+    app.config.update(BACKUP_YIELD_PER=2, JOB_PROGRESS_ROWS=4)
+    seed(sessions=5)
+    saved = []
+
+    @event.listens_for(db.engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE job SET progress"):
+            saved.append(parameters[0])
+
+    response = login().get("/admin/jobs/export")
+    wait_for_job(int(response.headers["Location"].rsplit("/", 1)[1]), 10)
+    event.remove(db.engine, "before_cursor_execute", capture)
+
+    assert saved == [4, 8]
+
+
+def test_cleanup_fails_stale_jobs(app, seed, tmp_path):
+    seed(sessions=1)
+    upload = tmp_path / "upload.zip"
+    upload.write_bytes(b"backup")
+    old = datetime.utcnow() - timedelta(hours=2)
+    db.session.add_all(
+        [
+            Job(
+                kind="import",
+                status="running",
+                path=str(upload),
+                user_id=1,
+                updated=old,
+            ),
+            Job(kind="export", status="queued", user_id=1),
+        ]
+    )
+    db.session.commit()
+
+    cleanup_jobs()
+
+    lost, fresh = Job.query.order_by(Job.id).all()
+    assert lost.status == "failed"
+    assert lost.path is None
+    assert not upload.exists()
+    assert fresh.status == "queued"
+
+    fresh_id = fresh.id
+    app.test_cli_runner().invoke(args=["cleanup-jobs", "--all"])
+
+    assert Job.query.get(fresh_id).status == "failed"
+
+
+def test_cleanup_keeps_jobs_of_live_workers(app, seed):
+    seed(sessions=1)
+    finished = subprocess.Popen(["true"])
+    finished.wait()
+    host = socket.gethostname()
+    old = datetime.utcnow() - timedelta(hours=2)
+    for pid in (os.getpid(), finished.pid):
+        db.session.add(
+            Job(
+                kind="import",
+                status="running",
+                owner="{}:{}".format(host, pid),
+                user_id=1,
+                updated=old,
+            )
+        )
+    db.session.commit()
+
+    cleanup_jobs()
+
+    live, dead = Job.query.order_by(Job.id).all()
+    assert live.status == "running"
+    assert dead.status == "failed"
+
+
+def test_expired_exports_are_deleted(app, seed, login):
+    seed(sessions=1)
+    client = login()
+    response = client.get("/admin/jobs/export")
+    job_id = int(response.headers["Location"].rsplit("/", 1)[1])
+    wait_for_job(job_id, timeout=10)
+    path = Job.query.get(job_id).path
+
+    app.config["JOB_EXPORT_SECONDS"] = -1
+    status = client.get(
+        "/admin/jobs/{}".format(job_id),
+        headers={"Accept": "application/json"},
+    ).get_json()
+
+    assert status["download"] is False
+    assert status["message"] == "Backup expired"
+    assert not os.path.exists(path)
+    download = client.get("/admin/jobs/{}/download".format(job_id))
+    assert download.status_code == 404
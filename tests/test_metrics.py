@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import exc, text
+
+from app import db, metrics
+
+
+@pytest.fixture()
+def recorder(app):
+    app.config["METRICS_ENABLED"] = True
+    metrics.init_app(app)
+    return app.extensions["metrics"]
+
+
+def test_requests_are_timed_and_their_queries_counted(client, seed, recorder):
+    seed(sessions=3)
+
+    client.get("/skill/all")
+    client.get("/skill/all")
+
+    stats = recorder.endpoints["main.skill_all"]
+    assert stats.count == 2
+    assert stats.queries >= 2
+    assert sum(stats.buckets) == 2
+    assert recorder.slowest_statements()
+
+
+def test_prometheus_endpoint(app, client, recorder):
+    client.get("/about")
+    assert client.get("/metrics").status_code == 404
+    app.config["METRICS_TOKEN"] = "secret"
+
+    assert client.get("/metrics").status_code == 401
+    body = client.get(
+        "/metrics", headers={"Authorization": "Bearer secret"}
+    ).get_data(as_text=True)
+
+    assert "# TYPE portfolio_request_duration_seconds histogram" in body
+    assert (
+        'portfolio_request_duration_seconds_bucket{endpoint="main.about",'
+        'le="+Inf"} 1' in body
+    )
+    assert 'portfolio_db_queries_total{endpoint="main.about"} 0' in body
+
+
+def test_failed_statements_leave_no_start_time(app, recorder):
+    with db.engine.connect() as conn:
+        with pytest.raises(exc.OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        conn.execute(text("SELECT 1"))
+
+        assert not conn.info["metrics_start"]
+
+
+def test_admin_page(client, seed, login, recorder):
+    seed(sessions=1)
+    client.get("/session/all")
+    login()
+
+    body = client.get("/admin/metrics").get_data(as_text=True)
+
+    assert "main.session_all" in body
+    assert "Slowest Statements" in body
+
+
+def test_slow_requests_are_logged(app, client, recorder, caplog):
+    app.config["SLOW_REQUEST_MS"] = 0.001
+
+    with caplog.at_level("WARNING", logger=app.logger.name):
+        client.get("/about")
+
+    assert "Slow request: GET /about?" in caplog.text
+
+
+def test_metrics_are_off_by_default(app, client):
+    assert "metrics" not in app.extensions
+    assert client.get("/metrics").status_code == 404
@@ -0,0 +1,117 @@
+import json
+
+import pytest
+from sqlalchemy.dialects import mysql
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateTable
+
+from app import db
+from app.models import (
+    Project,
+    Session,
+    Skill,
+    create_skills_from_csv_string,
+)
+
+
+def test_project_skill_minutes_are_summed(seed):
+    seed(sessions=4, skills_per_session=2)
+    project = Project.query.first()
+
+    # sessions 0 and 2 use skills 0-1, sessions 1 and 3 use skills 1-2
+    assert project.get_skill_minutes() == [
+        ("skill 0", 30 + 32),
+        ("skill 1", 30 + 31 + 32 + 33),
+        ("skill 2", 31 + 33),
+    ]
+
+
+def test_project_graph_json_uses_aggregates(seed):
+    seed(sessions=4, skills_per_session=2)
+    graph = json.loads(Project.query.first().get_graphJSON())
+
+    assert list(graph["data"][0]["x"]) == ["skill 0", "skill 1", "skill 2"]
+
+
+def test_project_graph_json_is_cached_until_sessions_change(seed, login):
+    seed(sessions=4, skills_per_session=2)
+    project = Project.query.first()
+    first = project.get_graphJSON()
+
+    assert project.get_graphJSON() is first
+
+    login().get("/session/1/delete")
+
+    assert project.get_graphJSON() != first
+
+
+def test_project_graph_json_sees_writes_from_other_workers(seed):
+    seed(sessions=4, skills_per_session=2)
+    project = Project.query.first()
+    first = project.get_graphJSON()
+
+    # Another worker renames a skill; this process's cache never hears of it.
+    db.session.execute(
+        Skill.__table__.update().where(Skill.id == 1).values(name="renamed")
+    )
+    db.session.commit()
+
+    assert "renamed" in project.get_graphJSON()
+    assert project.get_graphJSON() != first
+
+
+def test_create_skills_dedupes_and_reuses_existing(seed, count_queries):
+    seed(sessions=1, skills_per_session=2)
+
+    with count_queries() as statements:
+        skills = create_skills_from_csv_string(
+            "skill 0, new one,, skill 0 ,new one,another"
+        )
+
+    assert [s.name for s in skills] == ["skill 0", "new one", "another"]
+    assert skills[0].id == 1
+    assert len([s for s in statements if s.startswith("SELECT")]) == 1
+
+
+def test_create_skills_matches_names_like_the_unique_index(seed):
+    seed(sessions=1, skills_per_session=2)
+
+    skills = create_skills_from_csv_string("SKILL 0, skill 1 , new, Skill 1")
+
+    assert [s.name for s in skills] == ["skill 0", "skill 1", "new"]
+    assert Skill.query.count() == 4
+
+
+def test_create_skills_folds_accents_like_the_unique_index(seed):
+    seed(sessions=1)
+    cafe = create_skills_from_csv_string("Café")[0]
+    db.session.commit()
+
+    skills = create_skills_from_csv_string("CAFÉ, cafe, Cafe ")
+
+    assert skills == [cafe]
+    assert Skill.query.filter(Skill.name.ilike("caf%")).count() == 1
+
+
+def test_create_skills_stays_in_callers_transaction(seed):
+    seed(sessions=1)
+    create_skills_from_csv_string("uncommitted")
+    db.session.rollback()
+
+    assert Skill.query.filter_by(name="uncommitted").first() is None
+
+
+def test_skill_names_are_unique(seed):
+    seed(sessions=1)
+    db.session.add(Skill(name="skill 0"))
+
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+
+
+@pytest.mark.parametrize("model", [Session, Skill, Project])
+def test_edit_stamps_keep_microseconds_on_mysql(model):
+    ddl = str(CreateTable(model.__table__).compile(dialect=mysql.dialect()))
+
+    assert "edited DATETIME(6) NOT NULL" in ddl
@@ -0,0 +1,32 @@
+def test_session_all_first_page_is_newest(client, seed):
+    seed(sessions=25)
+    response = client.get("/session/all?limit=10")
+    body = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert "session 24" in body
+    assert "session 15" in body
+    assert "session 14:" not in body
+    assert "before=16" in body
+    assert "Newer" not in body
+
+
+def test_session_all_before_cursor(client, seed):
+    seed(sessions=25)
+    body = client.get("/session/all?limit=10&before=16").get_data(
+        as_text=True
+    )
+
+    assert "session 14" in body
+    assert "session 5:" in body
+    assert "session 15:" not in body
+    assert "before=6" in body
+    assert "Newer" in body
+
+
+def test_limit_is_capped(app, client, seed):
+    seed(sessions=5)
+    app.config["MAX_PAGE_SIZE"] = 2
+    body = client.get("/skill/all?limit=500").get_data(as_text=True)
+
+    assert body.count("card-title") == 2
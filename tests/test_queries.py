@@ -0,0 +1,22 @@
+def test_session_all_query_count_is_constant(client, seed, count_queries):
+    seed(sessions=100, skills_per_session=3)
+
+    with count_queries() as small_page:
+        client.get("/session/all?limit=10")
+    with count_queries() as full_page:
+        body = client.get("/session/all?limit=100").get_data(as_text=True)
+
+    assert body.count("card-title") == 100
+    assert len(full_page) == len(small_page)
+    assert len(full_page) <= 3
+
+
+def test_session_one_loads_author_and_skills_eagerly(
+    client, seed, count_queries
+):
+    seed(sessions=1, skills_per_session=3)
+
+    with count_queries() as statements:
+        client.get("/session/1")
+
+    assert len(statements) <= 2
@@ -0,0 +1,120 @@
+import os
+
+from app import db, response_cache
+from app.cache import FileSystemBackend, MemoryBackend
+from app.models import Skill
+
+
+def test_anonymous_pages_are_served_from_cache(app, client, seed):
+    app.config["RESPONSE_CACHE_SECONDS"] = 60
+    seed(sessions=1)
+    hits = response_cache.hits
+    first = client.get("/skill/all").get_data(as_text=True)
+
+    db.session.add(Skill(name="brand new skill"))
+    db.session.commit()
+    second = client.get("/skill/all").get_data(as_text=True)
+
+    assert first == second
+    assert "brand new skill" not in second
+    assert response_cache.hits == hits + 1
+
+
+def test_cache_is_keyed_by_url(app, client, seed):
+    app.config["RESPONSE_CACHE_SECONDS"] = 60
+    app.config["PAGE_SIZE"] = 1
+    seed(sessions=2)
+
+    newest = client.get("/session/all").get_data(as_text=True)
+    older = client.get("/session/all?before=2").get_data(as_text=True)
+
+    assert "session 1:" in newest
+    assert "session 0:" in older
+
+
+def test_writes_invalidate_the_cache(app, client, seed, login):
+    app.config["RESPONSE_CACHE_SECONDS"] = 60
+    seed(sessions=1)
+    client.get("/skill/all")
+
+    login()
+    client.post("/skill", data={"name": "brand new skill"})
+    client.get("/logout")
+
+    assert "brand new skill" in client.get("/skill/all").get_data(as_text=True)
+
+
+def test_logged_in_users_bypass_the_cache(app, client, seed, login):
+    app.config["RESPONSE_CACHE_SECONDS"] = 60
+    seed(sessions=1)
+    login()
+    misses = response_cache.misses
+
+    client.get("/skill/all")
+    client.get("/skill/all")
+
+    assert response_cache.misses == misses
+
+
+def test_dashboard_is_cached_per_user(app, client, seed, login):
+    app.config["RESPONSE_CACHE_SECONDS"] = 60
+    seed(sessions=1)
+    anonymous = client.get("/index").get_data(as_text=True)
+    login()
+    hits = response_cache.hits
+
+    first = client.get("/index").get_data(as_text=True)
+    second = client.get("/index").get_data(as_text=True)
+
+    assert first == second != anonymous
+    assert "Logout" in second
+    assert response_cache.hits == hits + 1
+
+
+def test_memory_backend_expires_entries():
+    backend = MemoryBackend(1024)
+    backend.set("/a", (200, [], b"body"), 60)
+    backend.set("/b", (200, [], b"body"), -1)
+
+    assert backend.get("/a") == (200, [], b"body")
+    assert backend.get("/b") is None
+
+
+def test_filesystem_backend_is_shared_and_cleared(tmp_path):
+    writer = FileSystemBackend(str(tmp_path), 1024)
+    reader = FileSystemBackend(str(tmp_path), 1024)
+    writer.set("/a", (200, [("Content-Type", "text/html")], b"body"), 60)
+
+    assert reader.get("/a") == (200, [("Content-Type", "text/html")], b"body")
+
+    reader.clear()
+    assert writer.get("/a") is None
+
+
+def test_filesystem_backend_evicts_expired_and_oversized_entries(tmp_path):
+    backend = FileSystemBackend(str(tmp_path), 600)
+    backend.set("/expired", (200, [], b"x"), -1)
+    for i in range(5):
+        backend.set(f"/{i}", (200, [], b"x" * 100), 60 + i)
+
+    files = [name for name in os.listdir(tmp_path) if name.endswith(".cache")]
+    assert 0 < len(files) < 5
+    assert sum(os.path.getsize(tmp_path / name) for name in files) <= 600
+    assert backend.get("/4") is not None
+    assert backend.get("/0") is None
+
+
+def test_unused_query_args_are_redirected_away(app, client, seed):
+    app.config["RESPONSE_CACHE_SECONDS"] = 60
+    seed(sessions=2)
+
+    response = client.get("/session/all?junk=1&project=1&limit=1")
+    assert response.status_code == 302
+    assert response.headers["Location"].endswith(
+        "/session/all?limit=1&project=1"
+    )
+
+    misses = response_cache.misses
+    client.get("/session/all?project=1&limit=1")
+    client.get("/session/all?limit=1&project=1")
+    assert response_cache.misses == misses + 1
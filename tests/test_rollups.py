@@ -0,0 +1,223 @@
+from datetime import date, datetime
+
+from app import db
+from app.models import ActivityRollup, Project, Session, SkillStats, User
+from app.rollups import (
+    activity_series,
+    bucket_start,
+    counter_mismatches,
+    rebuild_activity_rollups,
+    rebuild_skill_stats,
+)
+
+
+def _stats():
+    return {
+        s.skill_id: (
+            s.total_minutes,
+            s.session_count,
+            s.first_seen,
+            s.last_seen,
+        )
+        for s in SkillStats.query.order_by(SkillStats.skill_id)
+    }
+
+
+def _session_form(**overrides):
+    data = {
+        "name": "new session",
+        "duration": 45,
+        "level": "basic",
+        "timezone": "UTC",
+        "project-old_project": 1,
+        "created": "2021-06-01",
+        "starttime": "09:00",
+        "endtime": "10:00",
+        "skills": "skill 0, brand new",
+    }
+    data.update(overrides)
+    return data
+
+
+def _activity():
+    return {
+        (r.dimension, r.key_id, r.period, r.bucket): (
+            r.total_minutes,
+            r.session_count,
+        )
+        for r in ActivityRollup.query
+    }
+
+
+def _assert_matches_rebuild():
+    incremental = _stats(), _activity()
+    rebuild_skill_stats()
+    rebuild_activity_rollups()
+    db.session.commit()
+    assert incremental == (_stats(), _activity())
+
+
+def test_skill_stats_follow_session_writes(seed, login):
+    seed(sessions=4, skills_per_session=2)
+    client = login()
+
+    client.post("/session", data=_session_form())
+    assert SkillStats.query.get(1).session_count == 3
+    _assert_matches_rebuild()
+
+    response = client.post(
+        "/session/5/update", data=_session_form(duration=10, skills="skill 2")
+    )
+    assert response.status_code == 302
+    assert SkillStats.query.get(3).total_minutes == 31 + 33 + 10
+    _assert_matches_rebuild()
+
+    client.get("/session/5/delete")
+    client.get("/session/1/delete")
+    _assert_matches_rebuild()
+
+
+def test_deleted_skill_loses_its_activity(seed, login):
+    seed(sessions=2)
+    login().get("/skill/1/delete")
+
+    assert not ActivityRollup.query.filter_by(
+        dimension="skill", key_id=1
+    ).all()
+    assert ActivityRollup.query.filter_by(dimension="skill", key_id=2).all()
+    _assert_matches_rebuild()
+
+
+def test_rebuild_rollups_cli(app, seed):
+    seed(sessions=3)
+    SkillStats.query.delete()
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["rebuild-rollups"])
+
+    assert "rebuilt" in result.output
+    assert SkillStats.query.count() == 3
+
+
+def test_skill_pages_show_totals(client, seed):
+    seed(sessions=4, skills_per_session=2)
+    body = client.get("/skill/1").get_data(as_text=True)
+
+    assert "Total Time: 62 min" in body
+    assert "Sessions: 2" in body
+
+
+def test_bucket_start():
+    day = date(2022, 5, 19)
+
+    assert bucket_start(day, "day") == day
+    assert bucket_start(day, "week") == date(2022, 5, 16)
+    assert bucket_start(day, "month") == date(2022, 5, 1)
+
+
+def test_activity_series_fills_empty_buckets(seed, login):
+    seed(sessions=1)
+    client = login()
+    client.post("/session", data=_session_form(created="2021-06-01"))
+    client.post("/session", data=_session_form(created="2021-06-15"))
+
+    series = activity_series(
+        "skill", 1, "week", date(2021, 5, 31), date(2021, 6, 20)
+    )
+
+    assert [point["minutes"] for point in series] == [45, 0, 45]
+    assert series[0]["bucket"] == "2021-05-31"
+
+
+def test_activity_endpoint(client, seed, login):
+    seed(sessions=1)
+    login().post("/session", data=_session_form(created="2021-06-01"))
+    response = client.get(
+        "/activity/project/1.json?period=month"
+        "&start=2021-01-01&end=2021-12-31"
+    )
+    data = response.get_json()
+
+    assert len(data["series"]) == 12
+    assert data["series"][5] == {
+        "bucket": "2021-06-01",
+        "minutes": 45,
+        "sessions": 1,
+    }
+    assert client.get("/activity/bogus/1.json").status_code == 404
+    assert (
+        client.get("/activity/user/1.json?start=2022-13-01").status_code == 400
+    )
+
+
+def _counters(model, key_id):
+    row = model.query.get(key_id)
+    return row.session_count, row.total_minutes, row.last_activity
+
+
+def test_counters_follow_session_writes(seed, login):
+    seed(sessions=4, skills_per_session=1, projects=2)
+    assert _counters(User, 1)[:2] == (4, 30 + 31 + 32 + 33)
+    assert _counters(Project, 2)[:2] == (2, 31 + 33)
+    client = login()
+
+    client.post("/session", data=_session_form())
+    assert _counters(Project, 1)[:2] == (3, 30 + 32 + 45)
+    assert _counters(User, 1)[2] == Session.query.get(4).created
+
+    client.post("/session/5/update", data=_session_form(duration=10))
+    assert _counters(Project, 1)[:2] == (3, 30 + 32 + 10)
+
+    client.get("/session/5/delete")
+    client.get("/session/2/delete")
+    client.get("/session/4/delete")
+    assert _counters(Project, 2) == (0, 0, None)
+    assert _counters(User, 1)[:2] == (2, 30 + 32)
+    assert counter_mismatches() == []
+
+
+def test_bulk_sessions_update_counters(client, seed, login):
+    seed(sessions=1)
+    rows = [
+        dict(
+            name=f"bulk {i}",
+            duration=20,
+            level="basic",
+            project="new project",
+            skills="skill 0",
+            starttime="09:00",
+            endtime="09:20",
+            created="2023-03-0" + str(i + 1),
+            timezone="UTC",
+        )
+        for i in range(3)
+    ]
+    login().post("/session/bulk.json", json=rows)
+
+    assert _counters(Project, 2) == (3, 60, datetime(2023, 3, 3))
+    assert _counters(User, 1)[:2] == (4, 30 + 60)
+    assert counter_mismatches() == []
+
+
+def test_reconcile_counters_cli(app, seed):
+    seed(sessions=3)
+    User.query.get(1).total_minutes = 7
+    db.session.commit()
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=["reconcile-counters"])
+    assert result.exit_code != 0
+    assert "User 1: stored (3, 7" in result.output
+
+    result = runner.invoke(args=["reconcile-counters", "--fix"])
+    assert "Fixed 1 counter rows" in result.output
+    assert counter_mismatches() == []
+    assert "consistent" in runner.invoke(args=["reconcile-counters"]).output
+
+
+def test_project_pages_show_counters(client, seed):
+    seed(sessions=4, projects=2)
+    body = client.get("/project/2").get_data(as_text=True)
+
+    assert "Total Time: 64 min" in body
+    assert "Sessions: 2" in body
@@ -0,0 +1,81 @@
+from flask import g
+
+from app import db
+from app.database import pool_status, route_reads
+from app.models import Skill
+
+
+def replicate(replica):
+    """Copy every primary row to the replica, like replication catching up."""
+    primary = db.session.connection()
+    with replica.begin() as connection:
+        for table in reversed(db.Model.metadata.sorted_tables):
+            connection.execute(table.delete())
+        for table in db.Model.metadata.sorted_tables:
+            rows = [
+                dict(row._mapping) for row in primary.execute(table.select())
+            ]
+            if rows:
+                connection.execute(table.insert(), rows)
+
+
+def test_get_requests_read_from_the_replica(
+    app, client, replica, count_queries
+):
+    with replica.begin() as connection:
+        connection.execute(
+            Skill.__table__.insert(), {"name": "only on the replica"}
+        )
+
+    with count_queries() as primary, count_queries("replica") as secondary:
+        body = client.get("/skill/all").get_data(as_text=True)
+
+    assert "only on the replica" in body
+    assert primary == []
+    assert secondary
+    assert set(pool_status(db)) == {"primary", "replica"}
+
+
+def test_posts_write_to_the_primary(app, client, seed, replica, login):
+    seed(sessions=1)
+    replicate(replica)
+    login()
+
+    client.post("/skill", data={"name": "brand new skill"})
+
+    assert Skill.query.filter_by(name="brand new skill").count() == 1
+    with replica.connect() as connection:
+        names = connection.execute(db.select([Skill.name])).scalars().all()
+    assert "brand new skill" not in names
+
+
+def test_get_views_that_write_use_the_primary(
+    app, client, seed, replica, login
+):
+    seed(sessions=1)
+    replicate(replica)
+    login()
+    skill = Skill.query.filter_by(name="skill 2").one()
+
+    client.get(f"/skill/{skill.id}/delete")
+
+    db.session.expire_all()
+    assert Skill.query.filter_by(name="skill 2").count() == 0
+    assert "skill 2" in client.get("/skill/all").get_data(as_text=True)
+
+
+def test_reads_after_a_write_stay_on_the_primary(app, replica):
+    with replica.begin() as connection:
+        connection.execute(Skill.__table__.insert(), {"name": "replica"})
+
+    with app.test_request_context("/skill/all"):
+        route_reads()
+        assert Skill.query.count() == 1
+
+        db.session.add(Skill(name="primary"))
+        assert [s.name for s in Skill.query] == ["primary"]
+
+        db.session.commit()
+        assert g.use_replica is False
+        assert [s.name for s in Skill.query] == ["primary"]
+        db.session.remove()
@@ -0,0 +1,81 @@
+from app import db
+from app.models import Project, Skill
+from app.search import rebuild_search_index, search
+
+
+def _add_skill(name, explanation=None):
+    skill = Skill(name=name, explanation=explanation)
+    db.session.add(skill)
+    db.session.commit()
+    return skill
+
+
+def test_search_follows_writes(seed):
+    seed(sessions=2)
+    skill = _add_skill("Flask", "Web framework for python")
+
+    assert [r["title"] for r in search("flask")] == ["Flask"]
+    assert search("pyth")[0]["kind"] == "skill"
+
+    skill.name = "Django"
+    db.session.commit()
+    assert search("flask") == []
+
+    db.session.delete(skill)
+    db.session.commit()
+    assert search("django") == []
+
+
+def test_search_index_survives_a_rolled_back_first_write(app):
+    db.session.add(Skill(name="Flask"))
+    db.session.flush()
+    db.session.rollback()
+
+    _add_skill("Django")
+
+    assert [r["title"] for r in search("django")] == ["Django"]
+
+
+def test_search_ranks_title_matches_first(seed):
+    seed(sessions=1)
+    _add_skill("Testing", "pytest")
+    db.session.add(Project(name="pytest plugin"))
+    db.session.commit()
+
+    results = search("pytest")
+
+    assert [r["kind"] for r in results] == ["project", "skill"]
+
+
+def test_search_ignores_query_syntax(seed):
+    seed(sessions=1)
+
+    assert search('" OR NEAR(') == []
+    assert search("") == []
+
+
+def test_rebuild_search_index_covers_existing_rows(seed):
+    seed(sessions=3)
+    db.session.execute("DELETE FROM search_index")
+    db.session.commit()
+    assert search("session") == []
+
+    rebuild_search_index()
+    db.session.commit()
+
+    assert len(search("session")) == 3
+
+
+def test_search_endpoint_paginates(app, client, seed):
+    app.config["SEARCH_PAGE_SIZE"] = 2
+    seed(sessions=5)
+
+    body = client.get("/search?q=session").get_data(as_text=True)
+    assert body.count("<li>Session") == 2
+    assert "page=2" in body
+
+    data = client.get(
+        "/search?q=session&page=3", headers={"Accept": "application/json"}
+    ).get_json()
+    assert len(data["results"]) == 1
+    assert data["results"][0]["url"].startswith("/session/")
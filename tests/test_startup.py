@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = {"numpy", "pandas", "plotly"}
+BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS") or 3000)
+
+
+def _import_times(module):
+    """Return ``{module: cumulative microseconds}`` for a cold import."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_application_import_skips_charting_libraries():
+    times = _import_times("application")
+
+    assert {name.split(".")[0] for name in times} & HEAVY == set()
+
+
+def test_application_import_time_is_within_budget():
+    times = _import_times("application")
+
+    assert times["application"] / 1000 < BUDGET_MS
@@ -0,0 +1,38 @@
+from app import db
+from app.models import Project, Session, Skill, SkillStats, User
+from app.search import search
+from app.synthetic import generate
+
+
+def test_generate_adds_rows_and_rebuilds_derived_tables(app):
+    generate(sessions=120, users=2, projects=3, skills=10, chunk_size=50)
+    db.session.commit()
+
+    assert Session.query.count() == 120
+    assert User.query.count() == 2
+    assert Project.query.count() == 3
+    assert Skill.query.count() == 10
+    assert SkillStats.query.count() > 0
+    assert search("Session 7")
+    assert all(1 <= len(se.skills) <= 6 for se in Session.query)
+
+
+def test_generate_appends_and_is_repeatable(app):
+    generate(sessions=10, users=1, projects=1, skills=5, seed=3)
+    generate(sessions=10, users=1, projects=1, skills=5, seed=3)
+    db.session.commit()
+
+    first, second = Session.query.order_by(Session.id).all()[::10]
+    assert Session.query.count() == 20
+    assert first.duration == second.duration
+    assert first.user_id != second.user_id
+
+
+def test_generate_data_command(app):
+    result = app.test_cli_runner().invoke(
+        args=["generate-data", "--sessions", "25", "--users", "1"]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Generated 25 sessions" in result.output
+    assert Session.query.count() == 25